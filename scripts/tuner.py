@@ -2,6 +2,8 @@ from __future__ import annotations
 import os, json, subprocess, itertools, datetime as dt
 from pathlib import Path
 
+os.environ.setdefault("RATE_PRIORITY", "background")  # replay subprocesses share the live loop's budget
+
 PRESET = os.getenv("PRESET","")  # optional path; if blank, toy signal path is used
 TICKER = os.getenv("TICKER","TSLA")
 DATES  = os.getenv("DATES","").split(",")  # e.g. 2025-10-10,2025-10-15 (inclusive range)
@@ -29,6 +31,19 @@ else:
         d -= dt.timedelta(days=1)
     DAYLIST.reverse()
 
+# fill the local bar lake once; every grid candidate then replays the same days offline
+try:
+    from barronai.data.bar_lake import bar_lake
+    _end = (dt.date.fromisoformat(DAYLIST[-1])+dt.timedelta(days=1)).isoformat()
+    _sync = bar_lake().sync(TICKER, DAYLIST[0], _end)
+    print("lake sync:", _sync)
+    if _sync["failed_days"]:
+        print("lake incomplete (replays will fetch on demand):", _sync["failed_days"])
+    else:
+        os.environ["BAR_LAKE_OFFLINE"] = "1"
+except Exception as e:
+    print("lake sync failed (replays will fetch on demand):", e)
+
 grid_weights = [ (0.6,0.3,0.1), (0.5,0.35,0.15), (0.45,0.4,0.15) ]
 thresholds   = [0.28, 0.32, 0.36]
 
@@ -68,7 +83,9 @@ with open("tmp/exp/tune_results.json","w",encoding="utf-8") as f:
 
 best = candidates[0] if candidates else {"override":{}}
 Path("tmp/params").mkdir(parents=True, exist_ok=True)
-with open("tmp/params/current_params.json","w",encoding="utf-8") as f:
-    json.dump(best["override"], f, indent=2)
+# atomic swap: the live loop's preset registry watches this file and reloads it on change
+_tmp = Path("tmp/params/current_params.json.tmp")
+_tmp.write_text(json.dumps(best["override"], indent=2), encoding="utf-8")
+_tmp.replace("tmp/params/current_params.json")
 print("BEST:", json.dumps(best, indent=2))
 print("Wrote: tmp/params/current_params.json and tmp/exp/tune_results.json")
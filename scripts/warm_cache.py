@@ -1,7 +1,16 @@
-from barronai.data.providers.polygon import PolygonProvider
-import os
+import os, sys
+os.environ.setdefault("RATE_PRIORITY", "background")  # leave rate budget headroom for the live loop
+from barronai.core.warmup import rank, warm, run_until_open, in_warm_window
 
+# python scripts/warm_cache.py          -> warm repeatedly through the pre-open window (WARM_START..WARM_END ET)
+# python scripts/warm_cache.py --once   -> one prioritized pass now
 wl = os.getenv("WATCHLIST","TSLA,NVDA,PLTR").split(",")
-wl = [t.strip() for t in wl if t.strip()]
-print("warming", wl)
-print(PolygonProvider().quote_snapshot(wl))
+wl = [t.strip().upper() for t in wl if t.strip()]
+universe = os.getenv("UNIVERSE","watchlist").lower()
+
+if "--once" in sys.argv or not in_warm_window():
+    order = rank(wl, universe)
+    print("warming", order[:20], "..." if len(order) > 20 else "")
+    print(warm(order))
+else:
+    run_until_open(wl, universe)
@@ -1,40 +1,54 @@
 from __future__ import annotations
 import os, math, requests, pandas as pd
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from .position_manager import Position, trail_stop_to_vwap
+from ..data.bar_store import bar_store
+from ..data.indicators import indicator_engine
+from ..data.stream import session_bounds
+from ..core.rate_limit import limited, RateLimitTimeout
+from ..core.singleflight import coalesced
+
+STORE_MAX_AGE_S = 90  # reuse bars already in the shared BarStore if written this recently
 
 POLY_API = "https://api.polygon.io"
 
-@retry(reraise=True, stop=stop_after_attempt(5), wait=wait_exponential(multiplier=0.5, max=8), retry=retry_if_exception_type(Exception))
+@retry(reraise=True, stop=stop_after_attempt(5), wait=wait_exponential(multiplier=0.5, max=8),
+       retry=retry_if_not_exception_type(RateLimitTimeout))
 def _get(path: str, params: dict | None=None):
     params = params or {}
     params["apiKey"] = os.getenv("POLYGON_API_KEY","")
-    r = requests.get(POLY_API+path, params=params, timeout=10)
+    r = limited("polygon", lambda: requests.get(POLY_API+path, params=params, timeout=10))
     r.raise_for_status()
     return r.json()
 
 def _today_range_ms():
-    now = datetime.now(timezone.utc)
-    start = int(datetime(now.year, now.month, now.day, tzinfo=timezone.utc).timestamp() * 1000)
-    end   = int(now.timestamp() * 1000)
-    return start, end
+    end = int(datetime.now(timezone.utc).timestamp() * 1000)
+    return session_bounds(end)[1], end   # the New York trading date, as the indicator engine keys it
 
 def ema(series: pd.Series, span: int = 20) -> float:
     if series.empty: return math.nan
     return float(series.ewm(span=span, adjust=False).mean().iloc[-1])
 
+@coalesced("latest_intraday")
 def latest_intraday(ticker: str):
+    store = bar_store()
     s,e = _today_range_ms()
-    res = _get(f"/v2/aggs/ticker/{ticker}/range/1/min/{s}/{e}", {"adjusted":"true", "sort":"asc", "limit":50000})
-    rows = res.get("results", [])
-    if not rows: return None
-    df = pd.DataFrame(rows)
-    # c=close, v=volume, vw=bar VWAP
-    last_close = float(df["c"].iloc[-1])
-    bar_vwap   = float(df["vw"].iloc[-1]) if "vw" in df else math.nan
-    ema20      = ema(df["c"], span=20)
+    if not (store.seeded(ticker) and store.age(ticker) <= STORE_MAX_AGE_S):
+        try:
+            res = _get(f"/v2/aggs/ticker/{ticker}/range/1/min/{s}/{e}", {"adjusted":"true", "sort":"asc", "limit":50000})
+        except RateLimitTimeout:
+            res = {}                     # out of budget: manage the stop on the bars we already hold
+        rows = res.get("results", [])
+        if rows: store.extend(ticker, pd.DataFrame(rows))
+        elif not store.seeded(ticker): return None
+    bars = store.view(ticker, since=s)
+    if not len(bars["t"]): return None
+    # c=close, v=volume, vw=bar VWAP; EMA20 updated incrementally, not re-run over the whole day
+    last_close = float(bars["c"][-1])
+    bar_vwap   = float(bars["vw"][-1])
+    ema20      = indicator_engine().sync(ticker, bars)["ema20"]
     return {"last": last_close, "bar_vwap": bar_vwap, "ema20": ema20}
 
 def manage_position(pos: Position, cushion_pct: float = 0.8) -> dict:
@@ -1,84 +1,107 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import numpy as np
 import pandas as pd
+from ..core.preset_loader import CompiledPreset, column_arrays, compile_preset
 
 # ---- Global universe gates (we also enforce in signal/risk) ----
 PRICE_MIN = 0.50
 PRICE_MAX = 20.00
 FLOAT_MAX = 50_000_000
 
-def _liq_guards(df: pd.DataFrame,
-                spread_max_pct: float = 1.5,
-                min_dollar_volume: int = 1_000_000,
-                rel_volume_min: float = 1.5) -> pd.DataFrame:
-    cols = {"spread_pct","dollar_volume","rel_volume"}
-    missing = [c for c in cols if c not in df.columns]
-    if missing:
-        # if data source doesn't have these yet, return df unchanged (dev mode)
-        return df.copy()
-    m = (
-        (df["spread_pct"] <= spread_max_pct) &
-        (df["dollar_volume"] >= min_dollar_volume) &
-        (df["rel_volume"] >= rel_volume_min)
-    )
-    return df[m].copy()
-
-def _universe(df: pd.DataFrame) -> pd.DataFrame:
-    cols = {"last","float"}
-    missing = [c for c in cols if c not in df.columns]
-    if missing:
-        return df.copy()
-    return df[(df["last"].between(PRICE_MIN, PRICE_MAX)) & (df["float"] <= FLOAT_MAX)].copy()
-
-# -------- Presets you provided (cleaned) --------
+# ---- Scans as rules: used here and fused by core.scan_engine (shared subexpressions) ----
+# gates apply only when their columns exist (dev data without liquidity columns passes unguarded)
+UNIVERSE_GATE = ({"last","float"}, [f"last >= {PRICE_MIN} and last <= {PRICE_MAX}", f"float <= {FLOAT_MAX}"])
+LIQ_GATE = ({"spread_pct","dollar_volume","rel_volume"},
+            ["spread_pct <= 1.5", "dollar_volume >= 1000000", "rel_volume >= 1.5"])
+
+BUILTIN_RULES = {
+    "basic_gainer": {"need": {"last","pct_change","volume"},
+                     "filters": ["pct_change > 10", "volume > 1000000"]},
+    "low_float_hod": {"need": {"last","volume","float","pct_change","day_high"},
+                      "filters": ["volume >= 100000", "float <= 10000000", "pct_change >= 10",
+                                  "last >= day_high * 0.98", "last <= day_high"]},
+    "premarket_low_float": {"need": {"last","pct_change","float","volume"},
+                            "filters": ["pct_change > 10", "float < 10000000", "volume > 1000000"]},
+    "vwap_hold": {"need": {"last","pct_change","volume","vwap"},
+                  "filters": ["pct_change >= 10", "volume >= 1000000", "abs((last - vwap) / vwap) <= 0.02"]},
+    "52w_hod": {"need": {"last","yesterday_volume","fifty_two_week_high"},
+                "filters": ["yesterday_volume > 1000000", "last >= fifty_two_week_high * 0.98",
+                            "last <= fifty_two_week_high"]},
+}
+
+def _rules(name: str, cols, exprs: list[str]) -> tuple[frozenset, CompiledPreset, list[str]]:
+    return frozenset(cols), compile_preset({"name": name, "filters": [{"expr": e} for e in exprs]}), exprs
+
+_GATES = {"universe": _rules("universe", *UNIVERSE_GATE), "liquidity": _rules("liquidity", *LIQ_GATE)}
+_COMPILED = {k: _rules(k, r["need"], r["filters"]) for k, r in BUILTIN_RULES.items()}
+
+class Snapshot:
+    """One market frame shared by every scan: column arrays and masks are built once, rows never copied."""
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self.columns = frozenset(df.columns)
+        self._cols: dict[str, np.ndarray] = {}
+        self._masks: dict[str, np.ndarray] = {}
+
+    def mask(self, key: str, rule: CompiledPreset) -> np.ndarray:
+        m = self._masks.get(key)
+        if m is None:
+            miss = [c for c in rule.columns if c not in self._cols]
+            if miss: self._cols.update(column_arrays(self.df, miss))
+            m = self._masks[key] = rule.mask(self.df, self._cols)
+        return m
+
+@dataclass
+class ScanHits:
+    """Row positions into the scanned snapshot, and the clauses every one of them satisfied."""
+    name: str
+    rows: np.ndarray
+    reasons: list[str]
+    df: pd.DataFrame = field(repr=False)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def tickers(self) -> list[str]:
+        return self.df["ticker"].to_numpy()[self.rows].tolist() if "ticker" in self.df.columns else []
+
+    def frame(self) -> pd.DataFrame:
+        """Materialize the matching rows (original index labels) — the only copy a scan makes."""
+        return self.df.iloc[self.rows]
+
+def find(name: str, df: pd.DataFrame | Snapshot) -> ScanHits:
+    """Positions matching a built-in scan; pass a Snapshot to share gate masks across scans."""
+    snap = df if isinstance(df, Snapshot) else Snapshot(df)
+    if not _COMPILED[name][0] <= snap.columns: return ScanHits(name, np.empty(0, dtype=np.intp), [], snap.df)
+    m = np.ones(snap.n, dtype=bool)
+    reasons = []
+    for key, (cols, rule, exprs) in (("universe", _GATES["universe"]), (name, _COMPILED[name]),
+                                     ("liquidity", _GATES["liquidity"])):
+        if not cols <= snap.columns: continue          # gate columns absent: pass unguarded
+        np.logical_and(m, snap.mask(key, rule), out=m)
+        reasons += exprs
+    return ScanHits(name, np.flatnonzero(m), reasons, snap.df)
+
+def scan_all(df: pd.DataFrame, names=None) -> dict[str, ScanHits]:
+    """Every built-in scan (or `names`) over one shared snapshot."""
+    snap = Snapshot(df)
+    return {k: find(k, snap) for k in (names or BUILTIN_RULES)}
+
+# -------- Presets you provided (cleaned); DataFrame results for existing callers --------
 
 def scan_basic_gainer(df: pd.DataFrame) -> pd.DataFrame:
-    df = _universe(df)
-    need = {"last","pct_change","volume"}
-    if not need.issubset(df.columns): return df.iloc[0:0]
-    m = (df["pct_change"] > 10) & (df["volume"] > 1_000_000)
-    return _liq_guards(df[m])
+    return find("basic_gainer", df).frame()
 
 def scan_low_float_hod(df: pd.DataFrame) -> pd.DataFrame:
-    df = _universe(df)
-    need = {"last","volume","float","pct_change","day_high"}
-    if not need.issubset(df.columns): return df.iloc[0:0]
-    m = (
-        (df["volume"] >= 100_000) &
-        (df["float"] <= 10_000_000) &
-        (df["pct_change"] >= 10) &
-        (df["last"] >= df["day_high"] * 0.98) &
-        (df["last"] <= df["day_high"])
-    )
-    return _liq_guards(df[m])
+    return find("low_float_hod", df).frame()
 
 def scan_premarket_low_float(df: pd.DataFrame) -> pd.DataFrame:
-    df = _universe(df)
-    need = {"last","pct_change","float","volume"}
-    if not need.issubset(df.columns): return df.iloc[0:0]
-    m = (
-        (df["pct_change"] > 10) &
-        (df["float"] < 10_000_000) &
-        (df["volume"] > 1_000_000)
-    )
-    return _liq_guards(df[m], spread_max_pct=1.5)
+    return find("premarket_low_float", df).frame()
 
 def scan_vwap_hold(df: pd.DataFrame) -> pd.DataFrame:
-    df = _universe(df)
-    need = {"last","pct_change","volume","vwap"}
-    if not need.issubset(df.columns): return df.iloc[0:0]
-    m = (
-        (df["pct_change"] >= 10) &
-        (df["volume"] >= 1_000_000) &
-        (abs((df["last"] - df["vwap"]) / df["vwap"]) <= 0.02)
-    )
-    return _liq_guards(df[m])
+    return find("vwap_hold", df).frame()
 
 def scan_52w_hod(df: pd.DataFrame) -> pd.DataFrame:
-    df = _universe(df)
-    need = {"last","yesterday_volume","fifty_two_week_high"}
-    if not need.issubset(df.columns): return df.iloc[0:0]
-    m = (
-        (df["yesterday_volume"] > 1_000_000) &
-        (df["last"] >= df["fifty_two_week_high"] * 0.98) &
-        (df["last"] <= df["fifty_two_week_high"])
-    )
-    return _liq_guards(df[m])
+    return find("52w_hod", df).frame()
@@ -2,6 +2,7 @@ from __future__ import annotations
 import os, json
 from typing import Optional
 import requests
+from ..core.rate_limit import limited
 
 class OrderResult(dict): ...
 
@@ -24,10 +25,21 @@ class TradeExecutor:
 
     def _post(self, path: str, payload: dict) -> OrderResult:
         url = f"{self.base_url}{path}"
-        r = requests.post(url, headers=self._headers(), data=json.dumps(payload), timeout=10)
+        r = limited("alpaca", lambda: requests.post(url, headers=self._headers(), data=json.dumps(payload), timeout=10))
         r.raise_for_status()
         return OrderResult(r.json())
 
+    def open_symbols(self) -> list[str]:
+        """Symbols with an open position at the broker ([] without credentials or on any error)."""
+        if not (self.key_id and self.secret): return []
+        try:
+            url = f"{self.base_url}/v2/positions"
+            r = limited("alpaca", lambda: requests.get(url, headers=self._headers(), timeout=10))
+            r.raise_for_status()
+            return [str(p["symbol"]).upper() for p in r.json()]
+        except Exception:
+            return []
+
     def _log_order(self, payload: dict, status: str):
         pathlib.Path("tmp/journal").mkdir(parents=True, exist_ok=True)
         path = "tmp/journal/orders.jsonl"
@@ -1,28 +1,23 @@
 
 from __future__ import annotations
 import os, math, requests, pandas as pd
-from datetime import datetime, timezone
 from ..core.preset_loader import run_preset, load_yaml
+from ..core.rate_limit import limited
+from ..data.bar_lake import bar_lake
 
 API = "https://api.polygon.io"
 
 def _get(path: str, params: dict=None):
     params = params or {}
     params["apiKey"] = os.getenv("POLYGON_API_KEY","")
-    r = requests.get(API+path, params=params, timeout=20)
+    r = limited("polygon", lambda: requests.get(API+path, params=params, timeout=20))
     r.raise_for_status()
     return r.json()
 
-def _to_ms(d: datetime) -> int:
-    return int(d.replace(tzinfo=timezone.utc).timestamp()*1000)
-
 def load_minute_bars(ticker: str, start: str, end: str) -> pd.DataFrame:
-    s = datetime.fromisoformat(start); e = datetime.fromisoformat(end)
-    res = _get(f"/v2/aggs/ticker/{ticker}/range/1/min/{_to_ms(s)}/{_to_ms(e)}",
-               {"adjusted":"true", "sort":"asc", "limit":"50000"})
-    rows = res.get("results", [])
-    if not rows: return pd.DataFrame()
-    df = pd.DataFrame(rows)
+    """Minute bars from the local bar lake; only days it doesn't hold yet are downloaded."""
+    df = bar_lake().load(ticker, start, end)
+    if df.empty: return pd.DataFrame()
     df["ts"] = pd.to_datetime(df["t"], unit="ms", utc=True)
     df["last"] = df["c"]; df["vwap"] = df.get("vw"); df["volume"] = df["v"]
     df["day_high"] = df["last"].cummax()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os, math, sys, argparse
+os.environ.setdefault("RATE_PRIORITY", "background")  # offline backtest: wait for budget instead of failing days
 import pandas as pd
 from datetime import datetime, timezone
 try:
@@ -16,6 +17,14 @@ except Exception:
 
 import json, argparse, time
 from pathlib import Path as _Path
+from .basic_replay import load_minute_bars
+
+def _dl_bars(ticker: str, start: str, end: str) -> pd.DataFrame:
+    try:
+        return load_minute_bars(ticker, start, end)
+    except Exception as e:
+        print("bar load failed:", e)
+        return pd.DataFrame()
 
 def _apply_override(preset: dict, override: dict) -> dict:
     if not override: return preset
@@ -2,6 +2,7 @@ from __future__ import annotations
 import json
 from typing import Any, Dict, Optional
 import requests
+from .rate_limit import limited
 
 
 class Alpaca:
@@ -17,7 +18,7 @@ class Alpaca:
     # -------- low-level request
     def _req(self, method: str, path: str, **kw) -> requests.Response:
         url = f"{self.base_url}{path}"
-        return requests.request(method, url, headers=self.hdrs, timeout=20, **kw)
+        return limited("alpaca", lambda: requests.request(method, url, headers=self.hdrs, timeout=20, **kw))
 
     # -------- helpers
     @staticmethod
@@ -0,0 +1,178 @@
+"""Record/replay of upstream responses for reproducible benchmarks.
+
+    CASSETTE_MODE=record python -c "from barronai.core.scheduler import tick_once; tick_once()"
+    CASSETTE_MODE=replay CASSETTE_SPEED=0 python -c "..."   # 0 = no delay, 1 = recorded latency, 4 = 4x
+
+The archive is gzip'd JSON lines: a header with the recording start time, then one entry per call
+(kind, key, latency, result or error). Callers leave API keys out of the key; epoch-ms and ISO-date
+arguments are normalised so a replay on another day still finds "today's" requests, and repeated
+keys are served in recorded order. While replaying, clock() runs on the recorded timeline.
+Frames are stored as JSON (no pickle), and both modes bypass the disk cache and the reference
+store so a replay issues exactly the calls the recording made.
+"""
+from __future__ import annotations
+import os, re, json, gzip, time, atexit, threading
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable
+
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()        # off | record | replay
+CASSETTE_PATH = Path(os.getenv("CASSETTE_PATH", "tmp/cassettes/session.jsonl.gz"))
+CASSETTE_SPEED = float(os.getenv("CASSETTE_SPEED", "1.0"))       # replay latency multiplier is 1/speed
+CASSETTE_FLUSH_EVERY = 50
+
+_MS_RE = re.compile(r"\b\d{13}\b")
+_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+class CassetteMiss(LookupError):
+    pass
+
+def _canon(kind: str, key: Any) -> str:
+    s = json.dumps([kind, key], sort_keys=True, default=str)
+    return _DATE_RE.sub("<date>", _MS_RE.sub("<ms>", s))
+
+def _encode(x: Any) -> Any:
+    # frames are stored as to_json(orient="split") plus what that drops: column levels, index
+    # names and dtypes (yfinance frames carry MultiIndex columns and tz-aware indexes)
+    import pandas as pd
+    if isinstance(x, (pd.DataFrame, pd.Series)):
+        df = x.to_frame() if isinstance(x, pd.Series) else x
+        return {"__frame__": json.loads(df.to_json(orient="split", date_format="iso", date_unit="ns")),
+                "series": isinstance(x, pd.Series), "name": x.name if isinstance(x, pd.Series) else None,
+                "col_names": list(df.columns.names), "idx_names": list(df.index.names),
+                "idx_dtype": str(df.index.dtype), "dtypes": [str(t) for t in df.dtypes]}
+    return x
+
+def _datetimes(values, dtype: str):
+    """ISO strings from to_json back to `dtype` (unit and tz included)."""
+    import pandas as pd
+    dt = pd.api.types.pandas_dtype(dtype)
+    out = pd.to_datetime(values, utc=True)
+    conv = out.dt if isinstance(out, pd.Series) else out
+    out = conv.tz_convert(dt.tz) if getattr(dt, "tz", None) is not None else conv.tz_localize(None)
+    return out.astype(dt)
+
+def _decode_index(values: list, names: list, dtype: str = "object"):
+    import pandas as pd
+    if dtype.startswith("datetime64"):
+        return pd.DatetimeIndex(_datetimes(values, dtype), name=names[0])
+    if len(names) > 1:
+        return pd.MultiIndex.from_tuples([tuple(v) for v in values], names=names)
+    return pd.Index(values, name=names[0])
+
+def _decode(x: Any) -> Any:
+    if not (isinstance(x, dict) and "__frame__" in x): return x
+    import pandas as pd
+    f = x["__frame__"]
+    df = pd.DataFrame(f["data"] or None, index=_decode_index(f["index"], x["idx_names"], x["idx_dtype"]),
+                      columns=_decode_index(f["columns"], x["col_names"]))
+    for i, t in enumerate(x["dtypes"]):
+        col = df.iloc[:, i]
+        try: col = _datetimes(col, t) if t.startswith("datetime64") else col.astype(t)
+        except (TypeError, ValueError): continue
+        df.isetitem(i, col)
+    return df.iloc[:, 0].rename(x["name"]) if x["series"] else df
+
+def _raise_recorded(err: dict):
+    if err.get("type") == "RateLimitTimeout":      # replays take the same fallback the recording did
+        from .rate_limit import RateLimitTimeout
+        raise RateLimitTimeout(err.get("msg", ""))
+    if err.get("status"):
+        import requests
+        resp = requests.Response(); resp.status_code = int(err["status"])
+        raise requests.HTTPError(err.get("msg", ""), response=resp)
+    raise RuntimeError(f"{err.get('type', 'Error')}: {err.get('msg', '')}")
+
+class Cassette:
+    def __init__(self, mode: str = CASSETTE_MODE, path: Path = CASSETTE_PATH, speed: float = CASSETTE_SPEED):
+        self.mode = mode if mode in ("record", "replay") else "off"
+        self.path = Path(path)
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._fh = None
+        self._pending = 0
+        self._tape: dict[str, deque] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+        self.started = time.time()
+        self._t0 = time.time()
+        self.recorded = self.served = self.missed = 0
+        if self.mode == "replay": self._load()
+
+    # -- recording -----------------------------------------------------------------------------
+    def _append(self, entry: dict):
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = gzip.open(self.path, "wb")
+                self._fh.write((json.dumps({"cassette": 1, "started": self.started}) + "\n").encode("utf-8"))
+                atexit.register(self.close)
+            self._fh.write(line)
+            self.recorded += 1
+            self._pending += 1
+            if self._pending >= CASSETTE_FLUSH_EVERY:
+                self._fh.flush(); self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close(); self._fh = None
+
+    # -- replay --------------------------------------------------------------------------------
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for i, line in enumerate(fh):
+                row = json.loads(line)
+                if i == 0 and "cassette" in row:
+                    self.started = float(row["started"]); continue
+                self._tape[row["key"]].append(row)
+
+    def _next(self, key: str) -> dict:
+        with self._lock:
+            q = self._tape.get(key)
+            if q:
+                self._last[key] = q.popleft()
+            elif key not in self._last:
+                self.missed += 1
+                raise CassetteMiss(key)
+            self.served += 1
+            return self._last[key]     # exhausted keys keep answering with their last recording
+
+    # -- public --------------------------------------------------------------------------------
+    def clock(self) -> float:
+        """time.time(), or the recorded timeline while replaying."""
+        return self.started + (time.time() - self._t0) if self.mode == "replay" else time.time()
+
+    def call(self, kind: str, key: Any, fn: Callable[[], Any]) -> Any:
+        if self.mode == "off": return fn()
+        k = _canon(kind, key)
+        if self.mode == "replay":
+            row = self._next(k)
+            if self.speed > 0: time.sleep(row.get("elapsed", 0.0) / self.speed)
+            if "error" in row: _raise_recorded(row["error"])
+            return _decode(row.get("result"))
+        t0 = time.perf_counter()
+        try:
+            res = fn()
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            self._append({"kind": kind, "key": k, "elapsed": round(time.perf_counter() - t0, 4),
+                          "error": {"type": type(e).__name__, "msg": str(e)[:300], "status": status}})
+            raise
+        self._append({"kind": kind, "key": k, "elapsed": round(time.perf_counter() - t0, 4), "result": _encode(res)})
+        return res
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "path": str(self.path), "recorded": self.recorded,
+                "served": self.served, "missed": self.missed}
+
+_cassette: Cassette | None = None
+_cassette_lock = threading.Lock()
+
+def cassette() -> Cassette:
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette()
+    return _cassette
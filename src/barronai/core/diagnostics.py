@@ -1,6 +1,7 @@
 from __future__ import annotations
 import os, json, requests, pathlib, sys
 from datetime import datetime, timezone
+from .rate_limit import limited
 
 OK = "\u2705"; WARN = "\u26A0\uFE0F"; ERR = "\u274C"
 
@@ -14,7 +15,8 @@ def check_polygon():
     if not key: return {"service":"polygon","ok":False,"error":"missing key"}
     try:
         url = "https://api.polygon.io/v3/reference/exchanges"
-        r = requests.get(url, params={"apiKey": key}, timeout=8)
+        # timeout=0: a health check never waits for (or eats into) the live loop's budget
+        r = limited("polygon", lambda: requests.get(url, params={"apiKey": key}, timeout=8), timeout=0.0)
         ok = r.ok
         return {"service":"polygon","ok":ok,"code":r.status_code}
     except Exception as e:
@@ -25,7 +27,8 @@ def check_benzinga():
     if not key: return {"service":"benzinga","ok":False,"error":"missing key (optional)"}
     try:
         url = "https://api.benzinga.com/api/v2/news"
-        r = requests.get(url, params={"token": key, "channels":"general", "pagesize":1}, timeout=8)
+        r = limited("benzinga", lambda: requests.get(url, params={"token": key, "channels":"general", "pagesize":1}, timeout=8),
+                    timeout=0.0)
         return {"service":"benzinga","ok":r.ok,"code":r.status_code}
     except Exception as e:
         return {"service":"benzinga","ok":False,"error":str(e)}
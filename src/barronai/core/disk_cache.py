@@ -0,0 +1,197 @@
+from __future__ import annotations
+import os, json, time, threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable
+from .cassette import CASSETTE_MODE
+
+try:
+    import fcntl
+except Exception:  # non-POSIX: locking is per-process only
+    fcntl = None
+
+CACHE_ROOT = Path(os.getenv("CACHE_ROOT", "tmp/cache"))
+CACHE_MAX_BYTES = int(float(os.getenv("CACHE_MAX_MB", "512")) * 1024 * 1024)
+CACHE_LOW_WATER = 0.8             # evict down to this fraction of the budget
+CACHE_SWEEP_SECONDS = int(os.getenv("CACHE_SWEEP_SECONDS", "300"))
+# retention per namespace (seconds since last write); CACHE_TTL_<NS> overrides
+_DEFAULT_TTLS = {"aggs": 8 * 3600, "reference": 24 * 3600, "daily": 24 * 3600, "news": 300}
+_TMP_MAX_AGE = 3600               # leftovers from writers that died mid-write
+# record/replay sessions bypass the cache so every upstream call reaches the tape and replays match
+CACHE_BYPASS = CASSETTE_MODE in ("record", "replay")
+
+class DiskCache:
+    """Byte-budgeted cache directory shared by every process (dashboard, scheduler, warm_cache).
+
+    One subdirectory per namespace. Freshness is mtime (set by writes); recency is atime, bumped
+    explicitly on every hit, so eviction is LRU even on noatime mounts. Entries past their
+    namespace TTL are dropped first, then least-recently-used ones until under CACHE_LOW_WATER of
+    the budget. Sweeps hold an exclusive flock on {root}/.lock; writes hold it shared.
+    With bypass set (cassette sessions) reads always miss and writes are dropped.
+    """
+    def __init__(self, root: Path = CACHE_ROOT, max_bytes: int = CACHE_MAX_BYTES, bypass: bool = CACHE_BYPASS):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._approx_bytes: int | None = None
+        self._swept_at = 0.0
+        self.counts: dict[str, Counter] = {}
+
+    def ttl(self, ns: str) -> float:
+        return float(os.getenv(f"CACHE_TTL_{ns.upper()}", _DEFAULT_TTLS.get(ns, 24 * 3600)))
+
+    def dir(self, ns: str) -> Path:
+        d = self.root / ns
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def path(self, ns: str, key: str) -> Path:
+        return self.dir(ns) / key
+
+    def note(self, ns: str, what: str, by: int = 1):
+        with self._lock:
+            self.counts.setdefault(ns, Counter())[what] += by
+
+    @contextmanager
+    def locked(self, exclusive: bool = False):
+        if fcntl is None:
+            yield; return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try: yield
+            finally: fcntl.flock(lk, fcntl.LOCK_UN)
+
+    def age(self, ns: str, key: str) -> float:
+        """Seconds since the entry was written (inf if missing)."""
+        if self.bypass: return float("inf")
+        try: return time.time() - self.path(ns, key).stat().st_mtime
+        except OSError: return float("inf")
+
+    def read(self, ns: str, key: str, loader: Callable[[Path], Any], max_age: float | None = None,
+             count: bool = True) -> Any:
+        """loader(path) for an entry within max_age (default: the namespace TTL), else None."""
+        if self.bypass:
+            if count: self.note(ns, "miss")
+            return None
+        p = self.path(ns, key)
+        limit = self.ttl(ns) if max_age is None else max_age
+        try:
+            st = p.stat()
+            if time.time() - st.st_mtime > limit:
+                if count: self.note(ns, "miss")
+                return None
+            val = loader(p)
+            os.utime(p, (time.time(), st.st_mtime))   # LRU touch, keeps mtime (freshness)
+        except Exception:
+            if count: self.note(ns, "miss")
+            return None
+        if count: self.note(ns, "hit")
+        return val
+
+    def write(self, ns: str, key: str, writer: Callable[[Path], None]) -> bool:
+        """writer(tmp_path) fills a temp file which then atomically replaces the entry."""
+        if self.bypass: return True
+        p = self.path(ns, key)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with self.locked(exclusive=False):
+                try: old = p.stat().st_size
+                except OSError: old = 0
+                writer(tmp)
+                size = tmp.stat().st_size
+                tmp.replace(p)
+        except Exception:
+            try: tmp.unlink()
+            except OSError: pass
+            self.note(ns, "write_error"); return False
+        self.note(ns, "write")
+        with self._lock:
+            if self._approx_bytes is not None: self._approx_bytes += size - old
+        self.maybe_sweep()
+        return True
+
+    def read_json(self, ns: str, key: str, max_age: float | None = None) -> Any:
+        return self.read(ns, key, lambda p: json.loads(p.read_text(encoding="utf-8")), max_age)
+
+    def write_json(self, ns: str, key: str, obj: Any) -> bool:
+        return self.write(ns, key, lambda p: p.write_text(json.dumps(obj), encoding="utf-8"))
+
+    def cached_json(self, ns: str, key: str, fn: Callable[[], Any], max_age: float | None = None) -> Any:
+        """JSON-serialisable fn() result, served from disk while younger than max_age."""
+        val = self.read_json(ns, key, max_age)
+        if val is None:
+            val = fn()
+            if val is not None: self.write_json(ns, key, val)
+        return val
+
+    def maybe_sweep(self):
+        with self._lock:
+            due = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                   or time.time() - self._swept_at >= CACHE_SWEEP_SECONDS)
+        if due: self.sweep()
+
+    def _entries(self) -> list[tuple[str, os.DirEntry, os.stat_result]]:
+        out = []
+        if not self.root.exists(): return out
+        for nsd in os.scandir(self.root):
+            if not nsd.is_dir(): continue
+            for e in os.scandir(nsd.path):
+                try:
+                    if e.is_file(): out.append((nsd.name, e, e.stat()))
+                except OSError:
+                    continue
+        return out
+
+    def sweep(self) -> int:
+        """Drop expired entries, then LRU ones until under the low-water mark; returns evictions."""
+        now = time.time()
+        evicted = 0
+        with self.locked(exclusive=True):
+            entries = self._entries()
+            keep = []
+            for ns, e, st in entries:
+                expired = (now - st.st_mtime > _TMP_MAX_AGE if e.name.endswith(".tmp")
+                           else now - st.st_mtime > self.ttl(ns))
+                if expired and self._unlink(e.path):
+                    evicted += 1; self.note(ns, "expire")
+                elif not e.name.endswith(".tmp"):
+                    keep.append((ns, e, st))
+            total = sum(st.st_size for _, _, st in keep)
+            if total > self.max_bytes:
+                for ns, e, st in sorted(keep, key=lambda x: max(x[2].st_atime, x[2].st_mtime)):
+                    if total <= self.max_bytes * CACHE_LOW_WATER: break
+                    if self._unlink(e.path):
+                        total -= st.st_size; evicted += 1; self.note(ns, "evict")
+        with self._lock:
+            self._approx_bytes = total
+            self._swept_at = now
+        return evicted
+
+    @staticmethod
+    def _unlink(path: str) -> bool:
+        try: os.unlink(path); return True
+        except OSError: return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_ns = {ns: dict(c) for ns, c in self.counts.items()}
+            return {"bypass": self.bypass, "bytes": self._approx_bytes, "max_bytes": self.max_bytes,
+                    "swept_s_ago": round(time.time() - self._swept_at, 1) if self._swept_at else None,
+                    "namespaces": per_ns}
+
+_cache: DiskCache | None = None
+_cache_lock = threading.Lock()
+
+def disk_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache()
+    return _cache
+
+def stats() -> dict:
+    return disk_cache().stats()
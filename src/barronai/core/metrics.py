@@ -26,4 +26,28 @@ def bump(key: str, by: int = 1):
     _write(d)
 
 def snapshot() -> dict:
-    return _read()
+    d = _read()
+    try:
+        from .rate_limit import stats as rate_stats
+        d["rate_limits"] = rate_stats()
+        d["polygon_calls"] = d["rate_limits"]["polygon"]["calls"]
+        d["polygon_429"] = d["rate_limits"]["polygon"]["http_429"]
+    except Exception:
+        pass
+    try:
+        from .singleflight import stats as sf_stats
+        d["singleflight"] = sf_stats()
+    except Exception:
+        pass
+    try:
+        from .cassette import cassette
+        if cassette().mode != "off": d["cassette"] = cassette().stats()
+    except Exception:
+        pass
+    try:
+        from .disk_cache import stats as cache_stats
+        d["disk_cache"] = cache_stats()
+        d["cache_hits"] = sum(c.get("hit", 0) for c in d["disk_cache"]["namespaces"].values())
+    except Exception:
+        pass
+    return d
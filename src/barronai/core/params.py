@@ -1,30 +1,25 @@
 from __future__ import annotations
-import os, json, time
+import os, json
 from pathlib import Path
 from typing import Dict, Any
 
 _PARAM_PATH = os.getenv("PARAMS_PATH", "tmp/params/current_params.json")
-_cache: Dict[str, Any] | None = None
-_cache_mtime: float | None = None
 
 _DEFAULT = {
     "weights": {"structure": 0.5, "catalyst": 0.35, "narrative": 0.15},
     "threshold": 0.32,
 }
 
+def load_params(path: str | Path = _PARAM_PATH, fallback: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Params file if present; defaults if missing; `fallback` (last good) if it fails to parse."""
+    p = Path(path)
+    if not p.exists(): return dict(_DEFAULT)
+    try:
+        return json.loads(p.read_text())
+    except Exception:
+        return fallback if fallback is not None else dict(_DEFAULT)
+
 def get_params() -> Dict[str, Any]:
-    global _cache, _cache_mtime
-    p = Path(_PARAM_PATH)
-    if p.exists():
-        mt = p.stat().st_mtime
-        if _cache is None or _cache_mtime != mt:
-            try:
-                _cache = json.loads(p.read_text())
-                _cache_mtime = mt
-            except Exception:
-                _cache = _DEFAULT
-                _cache_mtime = time.time()
-    else:
-        _cache = _DEFAULT
-        _cache_mtime = time.time()
-    return _cache
+    """Current params from the preset registry (files re-checked at most every WATCH_POLL_S)."""
+    from .preset_registry import preset_registry
+    return preset_registry().current().params
@@ -1,29 +1,215 @@
 from __future__ import annotations
 from typing import Any, Callable
-import yaml, pandas as pd, math
-
-def _apply_rule(df: pd.DataFrame, rule: dict) -> pd.Series:
-    if "expr" in rule:
-        # safe eval: only allow df column names and math funcs
-        local = {c: df[c] for c in df.columns if c.isidentifier()}
-        local.update({"abs":abs, "math":math})
-        return eval(rule["expr"], {"__builtins__":{}}, local)
-    f, op, val = rule["field"], rule["op"], rule["value"]
-    s = df[f]
-    if op == "between": return s.between(val[0], val[1])
-    if op == ">" : return s >  val
-    if op == ">=": return s >= val
-    if op == "<" : return s <  val
-    if op == "<=": return s <= val
-    if op == "==" : return s == val
-    raise ValueError(f"Unknown op {op}")
-
-def run_preset(df: pd.DataFrame, preset: dict) -> pd.DataFrame:
+from dataclasses import dataclass, field
+from functools import reduce
+import ast, glob, json, os, threading
+import yaml, pandas as pd, numpy as np
+
+try:
+    import numexpr as ne
+except Exception:  # optional: plain NumPy otherwise
+    ne = None
+
+NUMEXPR_MIN_ROWS = int(os.getenv("NUMEXPR_MIN_ROWS", "20000"))   # below this NumPy is faster
+
+# quote_snapshot schema (+ backtest bar columns); presets may only reference these
+KNOWN_COLUMNS = frozenset({
+    "ticker","last","volume","float","day_high","vwap","pct_change","spread_pct","dollar_volume",
+    "rel_volume","ema20","yesterday_volume","fifty_two_week_high","atr","agg_source","quote_source","ts",
+})
+STRING_COLUMNS = frozenset({"ticker","agg_source","quote_source"})
+
+class PresetError(ValueError):
+    pass
+
+_BINOPS = {"Add": (np.add, "+"), "Sub": (np.subtract, "-"), "Mult": (np.multiply, "*"),
+           "Div": (np.true_divide, "/"), "Pow": (np.power, "**"), "Mod": (np.mod, "%")}
+_CMPOPS = {"Gt": (np.greater, ">"), "GtE": (np.greater_equal, ">="), "Lt": (np.less, "<"),
+           "LtE": (np.less_equal, "<="), "Eq": (np.equal, "=="), "NotEq": (np.not_equal, "!=")}
+_FUNCS = {"abs": (np.abs, "abs({0})", 1), "sqrt": (np.sqrt, "sqrt({0})", 1), "log": (np.log, "log({0})", 1),
+          "exp": (np.exp, "exp({0})", 1),
+          "min": (np.minimum, "where({0} < {1}, {0}, {1})", 2), "max": (np.maximum, "where({0} > {1}, {0}, {1})", 2)}
+_RULE_OPS = {">", ">=", "<", "<=", "==", "!="}
+
+# Validated expression tree, shared by the per-preset compiler and core.scan_engine's fused DAG:
+# (kind, payload, children) with kind in col/const/and/or/not/neg/bin/cmp/call. Hashable.
+Expr = tuple[str, Any, tuple]
+
+def _ir(n: ast.AST, src: str) -> Expr:
+    """The one whitelist: anything not handled here is rejected."""
+    if isinstance(n, ast.Expression): return _ir(n.body, src)
+    if isinstance(n, ast.Name):
+        if n.id not in KNOWN_COLUMNS: raise PresetError(f"unknown column {n.id!r} in {src!r}")
+        return ("col", n.id, ())
+    if isinstance(n, ast.Constant) and type(n.value) in (int, float, bool, str):
+        return ("const", (type(n.value).__name__, n.value), ())   # keep 1, 1.0, True apart
+    if isinstance(n, ast.BoolOp):
+        return ("and" if isinstance(n.op, ast.And) else "or", None, tuple(_ir(x, src) for x in n.values))
+    if isinstance(n, ast.UnaryOp):
+        a = _ir(n.operand, src)
+        if isinstance(n.op, ast.Not): return ("not", None, (a,))
+        if isinstance(n.op, ast.USub): return ("neg", None, (a,))
+        if isinstance(n.op, ast.UAdd): return a
+    if isinstance(n, ast.BinOp) and type(n.op).__name__ in _BINOPS:
+        return ("bin", type(n.op).__name__, (_ir(n.left, src), _ir(n.right, src)))
+    if isinstance(n, ast.Compare) and all(type(o).__name__ in _CMPOPS for o in n.ops):
+        terms = [_ir(x, src) for x in [n.left, *n.comparators]]
+        parts = tuple(("cmp", type(o).__name__, (a, b)) for a, o, b in zip(terms, n.ops, terms[1:]))
+        return parts[0] if len(parts) == 1 else ("and", None, parts)   # a < b < c -> (a < b) & (b < c)
+    if isinstance(n, ast.Call) and not n.keywords:
+        fn = n.func.attr if (isinstance(n.func, ast.Attribute) and isinstance(n.func.value, ast.Name)
+                             and n.func.value.id in ("math", "np")) else getattr(n.func, "id", None)
+        if fn in _FUNCS:
+            if len(n.args) != _FUNCS[fn][2]: raise PresetError(f"{fn}() takes {_FUNCS[fn][2]} argument(s) in {src!r}")
+            return ("call", fn, tuple(_ir(a, src) for a in n.args))
+    raise PresetError(f"unsupported syntax {type(n).__name__} in {src!r}")
+
+def parse_expr(src: str) -> Expr:
+    try: tree = ast.parse(src.strip(), mode="eval")
+    except SyntaxError as e: raise PresetError(f"bad expression {src!r}: {e.msg}") from None
+    return _ir(tree, src)
+
+def expr_columns(e: Expr) -> frozenset[str]:
+    kind, payload, ch = e
+    if kind == "col": return frozenset((payload,))
+    return frozenset().union(*(expr_columns(c) for c in ch)) if ch else frozenset()
+
+# a compiled node: (numpy fn over a {column: ndarray} dict, numexpr source or None)
+Node = tuple[Callable[[dict], Any], "str | None"]
+
+def _compile_node(e: Expr) -> Node:
+    """Validated tree -> vectorised evaluator. and/or/not are element-wise."""
+    kind, payload, ch = e
+    if kind == "col":
+        return (lambda c: c[payload]), payload
+    if kind == "const":
+        v = payload[1]
+        return (lambda c: v), (None if isinstance(v, str) else repr(v))
+    parts = [_compile_node(x) for x in ch]
+    fns = [f for f, _ in parts]
+    srcs = None if any(s is None for _, s in parts) else [s for _, s in parts]
+    if kind in ("and", "or"):
+        op, sym = (np.logical_and, " & ") if kind == "and" else (np.logical_or, " | ")
+        return (lambda c: reduce(op, (f(c) for f in fns))), (srcs and "(" + sym.join(f"({s})" for s in srcs) + ")")
+    if kind == "not":
+        f = fns[0]; return (lambda c: np.logical_not(f(c))), (srcs and f"~({srcs[0]})")
+    if kind == "neg":
+        f = fns[0]; return (lambda c: np.negative(f(c))), (srcs and f"-({srcs[0]})")
+    if kind in ("bin", "cmp"):
+        op, sym = (_BINOPS if kind == "bin" else _CMPOPS)[payload]
+        lf, rf = fns
+        return (lambda c: op(lf(c), rf(c))), (srcs and f"({srcs[0]} {sym} {srcs[1]})")
+    if kind == "call":
+        op, tmpl, _ = _FUNCS[payload]
+        return (lambda c: op(*(f(c) for f in fns))), (srcs and tmpl.format(*srcs))
+    raise PresetError(f"bad node {kind}")
+
+def compile_expr(src: str) -> tuple[Node, frozenset[str]]:
+    e = parse_expr(src)
+    return _compile_node(e), expr_columns(e)
+
+def _rule_expr(rule: dict) -> str:
+    """field/op/value rule -> expression source (one code path for both rule styles)."""
+    if "expr" in rule: return str(rule["expr"])
+    try: f, op, val = rule["field"], rule["op"], rule["value"]
+    except KeyError as e: raise PresetError(f"rule {rule!r} missing {e}") from None
+    if op == "between":
+        lo, hi = val
+        return f"({f} >= {lo!r}) and ({f} <= {hi!r})"
+    if op not in _RULE_OPS: raise PresetError(f"Unknown op {op}")
+    return f"{f} {op} {val!r}"
+
+@dataclass
+class CompiledPreset:
+    """A preset's filters fused into one validated, vectorised predicate."""
+    name: str
+    source: str                     # combined expression, for logs/debugging
+    columns: frozenset[str]
+    raw: dict = field(repr=False)
+    _fn: Callable[[dict], Any] = field(repr=False, default=None)
+    _ne: str | None = field(repr=False, default=None)
+
+    def get(self, key: str, default=None):   # dict-style access for code that reads preset fields
+        return self.raw.get(key, default)
+
+    def missing(self, columns) -> set[str]:
+        return set(self.columns) - set(columns)
+
+    def mask(self, df: pd.DataFrame, cols: dict[str, np.ndarray] | None = None) -> np.ndarray:
+        n = len(df)
+        if cols is None:
+            miss = self.missing(df.columns)
+            if miss: raise KeyError(f"preset {self.name!r} needs columns {sorted(miss)}")
+            cols = column_arrays(df, self.columns)
+        with np.errstate(all="ignore"):
+            if ne is not None and self._ne and n >= NUMEXPR_MIN_ROWS:
+                out = ne.evaluate(self._ne, local_dict={c: cols[c] for c in self.columns})
+            else:
+                out = self._fn(cols)
+        return np.broadcast_to(np.asarray(out, dtype=bool), (n,))
+
+def column_arrays(df: pd.DataFrame, names) -> dict[str, np.ndarray]:
+    """Columns as NumPy arrays (numeric as float64, NaN for missing/unparseable)."""
+    out = {}
+    for c in names:
+        s = df[c]
+        if c in STRING_COLUMNS: out[c] = s.to_numpy()
+        elif s.dtype.kind in "biuf": out[c] = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        else: out[c] = pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return out
+
+def compile_preset(preset: dict, name: str | None = None) -> CompiledPreset:
+    rules = (preset or {}).get("filters", []) or []
+    exprs = [_rule_expr(r) for r in rules]
+    nodes, cols = [], frozenset()
+    for e in exprs:
+        node, c = compile_expr(e)
+        nodes.append(node); cols |= c
+    fns = [f for f, _ in nodes]
+    ne_src = None if any(s is None for _, s in nodes) else " & ".join(f"({s})" for _, s in nodes) or None
+    fn = (lambda c: reduce(np.logical_and, (f(c) for f in fns))) if fns else (lambda c: True)
+    return CompiledPreset(name=name or (preset or {}).get("name", "preset"),
+                          source=" and ".join(f"({e})" for e in exprs) or "True",
+                          columns=cols, raw=preset or {}, _fn=fn, _ne=ne_src)
+
+_cache: dict[Any, CompiledPreset] = {}     # (path, mtime_ns) or canonical JSON of an in-memory preset
+_cache_lock = threading.Lock()
+_CACHE_MAX = 256
+
+def load_preset(path: str) -> CompiledPreset:
+    """Compiled preset for a YAML file, recompiled only when the file's mtime changes."""
+    p = os.path.abspath(path)
+    key = (p, os.stat(p).st_mtime_ns)
+    cp = _cache.get(key)
+    if cp is None:
+        cp = compile_preset(load_yaml(p))
+        with _cache_lock:
+            for k in [k for k in _cache if isinstance(k, tuple) and k[0] == p]: del _cache[k]
+            _cache[key] = cp
+    return cp
+
+def load_presets(pattern: str = "scans/presets/*.yml") -> dict[str, CompiledPreset]:
+    """Every preset matching pattern, by path; broken files are skipped with a message."""
+    out = {}
+    for path in sorted(glob.glob(pattern)):
+        try: out[path] = load_preset(path)
+        except Exception as e: print("preset skipped:", path, e)
+    return out
+
+def _compiled(preset) -> CompiledPreset:
+    if isinstance(preset, CompiledPreset): return preset
+    key = json.dumps(preset, sort_keys=True, default=str)
+    cp = _cache.get(key)
+    if cp is None:
+        cp = compile_preset(preset)
+        with _cache_lock:
+            if len(_cache) >= _CACHE_MAX: _cache.clear()
+            _cache[key] = cp
+    return cp
+
+def run_preset(df: pd.DataFrame, preset) -> pd.DataFrame:
     if df.empty: return df
-    m = pd.Series(True, index=df.index)
-    for rule in preset.get("filters", []):
-        m &= _apply_rule(df, rule)
-    return df[m].copy()
+    return df[_compiled(preset).mask(df)].copy()
 
 def load_yaml(path: str) -> dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import os, glob, time, atexit, threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from .preset_loader import CompiledPreset, load_presets
+from .scan_engine import ScanEngine, scan_engine
+from . import params as _params
+
+try:
+    import watchfiles
+except Exception:
+    watchfiles = None
+
+PRESET_GLOB = os.getenv("PRESET_GLOB", "scans/presets/*.yml")
+PRESET_WATCH = os.getenv("PRESET_WATCH", "1") in {"1","true","True","YES","yes"}   # scheduler runs the watcher
+WATCH_POLL_S = float(os.getenv("WATCH_POLL_S", "2.0"))   # re-check interval without watchfiles / without a watcher
+
+@dataclass(frozen=True)
+class RegistryState:
+    """One consistent generation of presets + scan engine + params; never mutated after publish."""
+    version: int
+    presets: dict[str, CompiledPreset]
+    engine: ScanEngine
+    params: dict[str, Any]
+    fields: frozenset[str]          # columns the engine reads; providers may skip the rest
+    loaded_at: float = field(default_factory=time.time)
+
+class PresetRegistry:
+    """Compiled presets and tuned params, reloaded off the hot path when their files change.
+
+    Readers call current() and get an immutable RegistryState; a background watcher (start())
+    rebuilds the next state and swaps the reference, bumping version. Without a watcher,
+    current() re-checks file mtimes at most every WATCH_POLL_S instead.
+    A file that fails to parse keeps the previous generation.
+    """
+    def __init__(self, pattern: str = PRESET_GLOB, params_path: str | None = None, builtins: bool = False):
+        self.pattern = pattern
+        self.params_path = Path(params_path or _params._PARAM_PATH)
+        self.builtins = builtins
+        self._lock = threading.Lock()
+        self._sig: tuple | None = None
+        self._checked = 0.0
+        self._state = RegistryState(0, {}, ScanEngine(), dict(_params._DEFAULT), frozenset())
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.reload()
+
+    def current(self) -> RegistryState:
+        if not self.watching and time.time() - self._checked >= WATCH_POLL_S: self.reload()
+        return self._state
+
+    @property
+    def watching(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    def _signature(self) -> tuple:
+        out = []
+        for p in sorted(glob.glob(self.pattern)) + [str(self.params_path)]:
+            try: out.append((p, os.stat(p).st_mtime_ns))
+            except OSError: out.append((p, None))
+        return tuple(out)
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild and publish a new state if any watched file changed; returns True if swapped."""
+        with self._lock:
+            sig = self._signature()
+            self._checked = time.time()
+            if sig == self._sig and not force: return False
+            old = self._state
+            presets = load_presets(self.pattern)
+            for path, cp in old.presets.items():          # broken edit: keep serving the last good one
+                if path not in presets and os.path.exists(path): presets[path] = cp
+            presets = dict(sorted(presets.items()))
+            params = _params.load_params(self.params_path, fallback=old.params)
+            engine = scan_engine(presets, builtins=self.builtins)
+            self._sig = sig
+            if (engine is old.engine and params == old.params) and not force: return False
+            self._state = RegistryState(old.version + 1, presets, engine, params, engine.columns())
+            return True
+
+    def _watch(self):
+        dirs = {str(Path(self.pattern).parent), str(self.params_path.parent)}
+        for d in dirs: Path(d).mkdir(parents=True, exist_ok=True)
+        while not self._stop.is_set():
+            try:
+                if watchfiles is not None:
+                    for _ in watchfiles.watch(*dirs, stop_event=self._stop, debounce=200, rust_timeout=1000):
+                        self.reload()
+                else:
+                    self._stop.wait(WATCH_POLL_S)
+                    self.reload()
+            except Exception as e:
+                print("preset watcher error:", e)
+                self._stop.wait(WATCH_POLL_S)
+
+    def start(self) -> "PresetRegistry":
+        if not self.watching:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="preset-watch", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout: float = 3.0):
+        self._stop.set()
+        t = self._thread
+        if t is not None and t.is_alive() and t is not threading.current_thread():
+            t.join(timeout)
+
+_registries: dict[bool, PresetRegistry] = {}
+_registry_lock = threading.Lock()
+
+def preset_registry(builtins: bool = False) -> PresetRegistry:
+    """The process-wide registry for this `builtins` setting; call start() to watch its files."""
+    reg = _registries.get(builtins)
+    if reg is None:
+        with _registry_lock:
+            reg = _registries.get(builtins)
+            if reg is None:
+                reg = _registries[builtins] = PresetRegistry(builtins=builtins)
+    return reg
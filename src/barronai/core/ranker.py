@@ -0,0 +1,65 @@
+from __future__ import annotations
+import os, math, heapq
+import numpy as np
+import pandas as pd
+from .scan_engine import ScanResult
+
+# Cross-sectional score: weighted sum of each feature's percentile rank among this tick's candidates
+# (scale-free, so a 40% gapper and a $1B dollar-volume name compare sensibly). "n_scans" is the number
+# of presets/scans the row hit. Override with params.json {"rank": {"weights": {...}, "top_k": N}}.
+DEFAULT_RANK_WEIGHTS = {"pct_change": 0.35, "rel_volume": 0.25, "dollar_volume": 0.2, "n_scans": 0.2}
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "20"))
+
+def rank_config(params: dict | None) -> tuple[dict[str, float], int]:
+    cfg = (params or {}).get("rank") or {}
+    return dict(cfg.get("weights") or DEFAULT_RANK_WEIGHTS), int(cfg.get("top_k") or RANK_TOP_K)
+
+def _num(df: pd.DataFrame, c: str) -> pd.Series:
+    return pd.to_numeric(df[c], errors="coerce") if c in df else pd.Series(float("nan"), index=df.index)
+
+def priority(df: pd.DataFrame) -> pd.Series:
+    """Cheap pre-scan ordering: |gap %| weighted by log dollar volume (volume if price is unknown).
+    Used where there are no scan hits yet: the warm-up order and the two-phase survivor cap."""
+    gap = _num(df, "pct_change").abs().fillna(0.0)
+    dv = _num(df, "dollar_volume")
+    if dv.isna().all(): dv = _num(df, "volume")
+    return (gap + 1.0) * dv.fillna(0.0).clip(lower=0).map(math.log1p)
+
+def rank_columns(weights: dict[str, float]) -> set[str]:
+    """Snapshot columns the score reads (for the provider's field projection)."""
+    return {c for c in weights if c != "n_scans"}
+
+def score(df: pd.DataFrame, weights: dict[str, float], n_scans: np.ndarray | None = None) -> np.ndarray:
+    """Weighted percentile ranks across rows; a missing/NaN feature contributes 0 for that row."""
+    out = np.zeros(len(df))
+    for c, w in weights.items():
+        if c == "n_scans":
+            if n_scans is None: continue
+            s = pd.Series(n_scans, index=df.index, dtype=float)
+        elif c in df:
+            s = pd.to_numeric(df[c], errors="coerce")
+        else:
+            continue
+        out += w * s.rank(pct=True).fillna(0.0).to_numpy()
+    return out
+
+def top_k(df: pd.DataFrame, res: ScanResult, k: int = RANK_TOP_K,
+          weights: dict[str, float] | None = None) -> pd.DataFrame:
+    """The k best rows hit by any scan, best first, one per ticker, with 'rank_score' and 'presets'.
+
+    Scores are computed for hit rows only; a bounded heap keeps the top k (O(n log k)) and only
+    those rows are materialized.
+    """
+    rows = np.flatnonzero(res.any())
+    if not len(rows) or k <= 0: return df.iloc[0:0].assign(rank_score=[], presets=[])
+    hits = df.iloc[rows]
+    s = score(hits, weights or DEFAULT_RANK_WEIGHTS, res.hits[rows].sum(axis=1))
+    tickers = hits["ticker"].tolist() if "ticker" in hits else list(range(len(rows)))
+    best: dict[object, int] = {}
+    for i, t in enumerate(tickers):           # duplicate tickers: keep the better-scored row
+        if t not in best or s[i] > s[best[t]]: best[t] = i
+    top = heapq.nlargest(k, best.values(), key=lambda i: (s[i], -i))   # ties: snapshot order
+    out = hits.iloc[top].copy()
+    out["rank_score"] = s[top].round(4)
+    out["presets"] = [res.matched(rows[i]) for i in top]
+    return out
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import os, json, time, threading, email.utils
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import fcntl
+except Exception:  # non-POSIX: buckets stay per-process
+    fcntl = None
+
+# Budgets are "<requests>/<seconds>[:burst]"; polygon defaults to its free tier (5/min),
+# raise it on a paid plan, e.g. RATE_LIMIT_POLYGON=100/1.
+_DEFAULT_BUDGETS = {"polygon": "5/60", "benzinga": "10/1", "alpaca": "200/60", "notion": "3/1"}
+RATE_DIR = Path(os.getenv("RATE_DIR", "tmp/ratelimit"))
+RATE_SHARED = os.getenv("RATE_SHARED", "1") in {"1","true","True","YES","yes"}  # share buckets across processes
+# background processes (warm_cache, tuner) leave this fraction of the burst for the live loop
+RATE_PRIORITY = os.getenv("RATE_PRIORITY", "live").lower()
+RATE_RESERVE = float(os.getenv("RATE_RESERVE", "0.25"))
+# live callers (tick, stop management, dashboard) give up after this long and use their fallback
+# (yfinance, cached bars) instead of sleeping; RATE_PRIORITY=background waits as long as it takes
+RATE_LIVE_TIMEOUT_S = float(os.getenv("RATE_LIVE_TIMEOUT_S", "0.5"))
+DEFAULT_RETRY_AFTER_S = 2.0
+# shared buckets: sync with the state file at least this often, leasing up to this fraction of the burst
+RATE_SYNC_S = float(os.getenv("RATE_SYNC_S", "1.0"))
+RATE_LEASE_FRAC = float(os.getenv("RATE_LEASE_FRAC", "0.1"))
+_COUNTERS = ("calls", "waits", "waited_s", "http_429", "factor")
+
+class RateLimitTimeout(TimeoutError):
+    pass
+
+def _parse_budget(spec: str) -> tuple[float, float, float]:
+    """'5/60:2' -> (5 requests, per 60s, burst 2); burst defaults to the request count."""
+    spec, _, burst = spec.partition(":")
+    n, _, per = spec.partition("/")
+    n = float(n); per = float(per or 1)
+    return n, per, float(burst or n)
+
+def _retry_after(headers) -> float:
+    raw = (headers or {}).get("Retry-After")
+    if not raw: return DEFAULT_RETRY_AFTER_S
+    try: return max(0.0, float(raw))
+    except ValueError: pass
+    try: return max(0.0, email.utils.parsedate_to_datetime(raw).timestamp() - time.time())
+    except Exception: return DEFAULT_RETRY_AFTER_S
+
+class TokenBucket:
+    """Token bucket for one upstream, optionally shared by every process via a locked state file.
+
+    A shared bucket leases a few tokens at a time into this process and spends them in memory;
+    the file is only locked and rewritten to refill the lease, every RATE_SYNC_S, or on a 429.
+    A 429 blocks the bucket until Retry-After and halves its effective rate; each success
+    recovers 5% of it (AIMD), so bursts back off instead of cascading into more 429s.
+    """
+    def __init__(self, name: str, budget: str, shared: bool = RATE_SHARED):
+        self.name = name
+        n, per, self.burst = _parse_budget(budget)
+        self.rate = n / per
+        self.shared = shared and fcntl is not None
+        self._path = RATE_DIR / f"{name}.json"
+        self._lock = threading.Lock()
+        self._state = self._fresh()          # the bucket; when shared, the file as of the last sync
+        self._lease = 0.0                    # tokens taken from the bucket, spendable without a sync
+        self._lease_max = max(1.0, self.burst * RATE_LEASE_FRAC) if self.shared else 0.0
+        self._pending = dict.fromkeys(_COUNTERS, 0)   # counter deltas not yet written to the bucket
+        self._synced = 0.0
+
+    def _fresh(self) -> dict:
+        return {"tokens": self.burst, "ts": time.time(), "blocked_until": 0.0, "factor": 1.0,
+                "calls": 0, "waits": 0, "waited_s": 0.0, "http_429": 0}
+
+    @contextmanager
+    def _bucket(self):
+        """Bucket state with this process's pending counters applied; caller holds self._lock."""
+        if not self.shared:
+            st = self._state
+        else:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            lk = open(self._path.with_suffix(".lock"), "a")
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            try: st = {**self._fresh(), **json.loads(self._path.read_text())}
+            except Exception: st = self._fresh()
+        try:
+            for k, v in self._pending.items():
+                st[k] = min(1.0, st[k] + v) if k == "factor" else st[k] + v
+            st["waited_s"] = round(st["waited_s"], 3)
+            self._pending = dict.fromkeys(_COUNTERS, 0)
+            yield st
+            if self.shared:
+                tmp = self._path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(st)); tmp.replace(self._path)
+                self._state = st
+        finally:
+            if self.shared:
+                fcntl.flock(lk, fcntl.LOCK_UN); lk.close()
+
+    def _sync(self, now: float, cost: float, floor: float) -> float:
+        """Refill the bucket and top the lease up to at least `cost`; returns seconds to wait (0 = ok)."""
+        with self._bucket() as st:
+            rate = self.rate * st["factor"]
+            st["tokens"] = min(self.burst, st["tokens"] + (now - st["ts"]) * rate)
+            st["ts"] = now
+            self._synced = now
+            if now < st["blocked_until"]:
+                self._lease = 0.0
+                return st["blocked_until"] - now
+            if self._lease >= cost: return 0.0
+            need = cost - self._lease
+            if st["tokens"] < floor:          # drained: wait for a whole lease, not a token per sync
+                return (floor - cost + max(need, min(self._lease_max, self.burst - floor + cost)) - st["tokens"]) / rate
+            grant = min(st["tokens"] - (floor - cost), max(need, self._lease_max - self._lease))
+            st["tokens"] -= grant
+            self._lease += grant
+            return 0.0
+
+    def acquire(self, cost: float = 1.0, timeout: float | None = None) -> float:
+        """Block until `cost` tokens are available; returns seconds waited."""
+        start = time.time()
+        floor = cost + (self.burst * RATE_RESERVE if RATE_PRIORITY == "background" else 0.0)
+        floor = min(floor, self.burst)
+        while True:
+            with self._lock:
+                now = time.time()
+                fresh = self.shared and now - self._synced < RATE_SYNC_S
+                wait = 0.0 if fresh and self._lease >= cost else self._sync(now, cost, floor)
+                if wait <= 0:
+                    self._lease -= cost
+                    self._pending["calls"] += 1
+                    waited = now - start
+                    if waited > 0.001:
+                        self._pending["waits"] += 1; self._pending["waited_s"] += waited
+                    return waited
+            if timeout is not None and time.time() - start + wait > timeout:
+                raise RateLimitTimeout(f"{self.name}: no budget within {timeout}s")
+            time.sleep(min(max(wait, 0.005), 1.0))
+
+    def note(self, status: int, headers=None):
+        """Feed back an upstream response status (and headers for Retry-After)."""
+        with self._lock:
+            if status == 429:
+                self._pending["http_429"] += 1
+                self._lease = 0.0
+                with self._bucket() as st:           # other processes must see the block right away
+                    st["blocked_until"] = max(st["blocked_until"], time.time() + _retry_after(headers))
+                    st["factor"] = max(0.1, st["factor"] * 0.5)
+                    st["tokens"] = 0.0
+            elif 200 <= status < 400 and self._state["factor"] + self._pending["factor"] < 1.0:
+                self._pending["factor"] += 0.05
+
+    def stats(self) -> dict:
+        """Read-only view: the bucket as last written plus this process's unsynced counters."""
+        with self._lock:
+            st = self._state
+            if self.shared:
+                try: st = {**self._fresh(), **json.loads(self._path.read_text())}
+                except Exception: pass
+            p = self._pending
+            now = time.time()
+            factor = min(1.0, st["factor"] + p["factor"])
+            tokens = min(self.burst, st["tokens"] + max(0.0, now - st["ts"]) * self.rate * st["factor"])
+            return {"rate_per_s": round(self.rate * factor, 4), "burst": self.burst,
+                    "tokens": round(tokens, 2), "leased": round(self._lease, 2),
+                    "blocked_s": round(max(0.0, st["blocked_until"] - now), 2),
+                    "calls": st["calls"] + p["calls"], "waits": st["waits"] + p["waits"],
+                    "waited_s": round(st["waited_s"] + p["waited_s"], 3), "http_429": st["http_429"] + p["http_429"]}
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def limiter(name: str) -> TokenBucket:
+    b = _buckets.get(name)
+    if b is None:
+        with _buckets_lock:
+            b = _buckets.get(name)
+            if b is None:
+                budget = os.getenv(f"RATE_LIMIT_{name.upper()}", _DEFAULT_BUDGETS.get(name, "10/1"))
+                b = _buckets[name] = TokenBucket(name, budget)
+    return b
+
+def acquire_timeout() -> float | None:
+    """Default acquire() timeout for this process: bounded unless it runs as background work."""
+    return None if RATE_PRIORITY == "background" else RATE_LIVE_TIMEOUT_S
+
+def limited(name: str, send: Callable[[], Any], timeout: float | None = -1.0) -> Any:
+    """Run one HTTP call under the upstream's budget and feed its status back into the bucket.
+
+    Raises RateLimitTimeout when no token frees up within `timeout` (default: acquire_timeout()).
+    """
+    b = limiter(name)
+    b.acquire(timeout=acquire_timeout() if timeout == -1.0 else timeout)
+    r = send()
+    b.note(getattr(r, "status_code", 200), getattr(r, "headers", None))
+    return r
+
+def stats() -> dict:
+    return {name: limiter(name).stats() for name in sorted(set(_DEFAULT_BUDGETS) | set(_buckets))}
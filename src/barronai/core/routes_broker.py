@@ -6,6 +6,7 @@ from typing import Any, Dict, Optional
 from fastapi import APIRouter, Body, Path, Query, Depends, HTTPException, Header
 from fastapi.responses import HTMLResponse
 import requests
+from .rate_limit import limited
 
 BROKER_API_KEY = os.getenv("BROKER_API_KEY")
 
@@ -28,7 +29,7 @@ class Alpaca:
 
     def _req(self, method: str, path: str, **kw) -> requests.Response:
         url = f"{self.base_url}{path}"
-        return requests.request(method, url, headers=self.hdrs, timeout=20, **kw)
+        return limited("alpaca", lambda: requests.request(method, url, headers=self.hdrs, timeout=20, **kw))
 
     @staticmethod
     def _ok(payload: Dict[str, Any]) -> Dict[str, Any]:
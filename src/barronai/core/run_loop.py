@@ -1,5 +1,5 @@
 import pandas as pd
-from ..agents import pattern_scanner as ps
+from .scan_engine import scan_engine
 from ..agents.signal_builder import SignalBuilder
 from ..agents.risk_engine import RiskEngine, RiskConfig
 from ..agents.trade_executor import TradeExecutor
@@ -18,13 +18,7 @@ def market_snapshot() -> pd.DataFrame:
 
 def main():
     df = market_snapshot()
-    candidates = pd.concat([
-        ps.scan_basic_gainer(df),
-        ps.scan_low_float_hod(df),
-        ps.scan_premarket_low_float(df),
-        ps.scan_vwap_hold(df),
-        ps.scan_52w_hod(df),
-    ], ignore_index=True).drop_duplicates(subset=["ticker"]) if not df.empty else df
+    candidates = scan_engine(builtins=True).scan(df).frame(df)   # all pattern_scanner scans, one pass
 
     sb = SignalBuilder()
     rk = RiskEngine(RiskConfig(account_equity=50_000))
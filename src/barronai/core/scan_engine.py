@@ -0,0 +1,343 @@
+from __future__ import annotations
+import json, os, threading
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .preset_loader import (CompiledPreset, PresetError, Expr, STRING_COLUMNS, column_arrays, parse_expr,
+                            _rule_expr, _BINOPS, _CMPOPS, _FUNCS)
+
+# DAG node: (kind, payload, child ids). Children are always interned first, so ids are topological.
+_Node = tuple[str, object, tuple[int, ...]]
+
+class _Dag:
+    """Hash-consed expression graph: identical subexpressions across all scans share one node."""
+    def __init__(self):
+        self.nodes: list[_Node] = []
+        self._ids: dict[_Node, int] = {}
+
+    def intern(self, kind: str, payload, children: tuple[int, ...] = ()) -> int:
+        key = (kind, payload, children)
+        i = self._ids.get(key)
+        if i is None:
+            i = self._ids[key] = len(self.nodes)
+            self.nodes.append(key)
+        return i
+
+    def _and(self, ids: list[int]) -> int:
+        ids = sorted(set(ids))                 # a & b == b & a: canonical order helps sharing
+        return ids[0] if len(ids) == 1 else self.intern("and", None, tuple(ids))
+
+    def add(self, e: Expr) -> int:
+        """Intern a validated preset_loader expression tree (children first)."""
+        kind, payload, ch = e
+        ids = [self.add(c) for c in ch]
+        if kind == "and": return self._and(ids)
+        if kind == "or": return self.intern("or", None, tuple(sorted(set(ids))))
+        return self.intern(kind, payload, tuple(ids))
+
+    def expr(self, src: str) -> int:
+        return self.add(parse_expr(src))
+
+_BIN_FN = {k: v[0] for k, v in _BINOPS.items()}
+_CMP_FN = {k: v[0] for k, v in _CMPOPS.items()}
+
+@dataclass
+class _Scan:
+    name: str
+    need: frozenset[str]
+    root: int
+    gates: tuple[tuple[frozenset[str], int], ...]   # (columns, node) applied only if columns exist
+
+@dataclass
+class ScanResult:
+    """Boolean hits[ticker_row, scan] over the scanned frame's rows, plus scan names."""
+    names: list[str]
+    hits: np.ndarray
+    index: pd.Index
+    skipped: list[str]          # scans not evaluated: the frame lacks columns they need
+
+    def any(self) -> np.ndarray:
+        return self.hits.any(axis=1)
+
+    def matched(self, row: int) -> list[str]:
+        return [self.names[j] for j in np.flatnonzero(self.hits[row])]
+
+    def counts(self) -> dict[str, int]:
+        return dict(zip(self.names, self.hits.sum(axis=0).tolist()))
+
+    def frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows hit by any scan (frame order), with a 'presets' column naming the scans that matched."""
+        rows = np.flatnonzero(self.any())
+        out = df.iloc[rows].copy()
+        out["presets"] = [self.matched(i) for i in rows]
+        return out
+
+class ScanEngine:
+    """All presets and built-in scans fused into one expression DAG, evaluated once per frame.
+
+    Shared subexpressions (the universe gate, `last >= 1.0`, `day_high * 0.98`, ...) are computed
+    once per frame however many scans use them, and no rows are copied until frame().
+    """
+    def __init__(self):
+        self.dag = _Dag()
+        self.scans: list[_Scan] = []
+        self._plans: dict[frozenset, tuple] = {}
+        self._coarse: dict[frozenset, tuple] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, filters: list[str], need=None, gates=()) -> "ScanEngine":
+        root = self.dag._and([self.dag.expr(f) for f in filters]) if filters else self.dag.intern("const", ("bool", True))
+        cols = frozenset(self.dag.nodes[i][1] for i in self._reach([root]) if self.dag.nodes[i][0] == "col")
+        g = tuple((frozenset(c), self.dag._and([self.dag.expr(e) for e in exprs])) for c, exprs in gates)
+        self.scans.append(_Scan(name, frozenset(need or ()) | cols, root, g))
+        self._plans.clear(); self._coarse.clear()
+        return self
+
+    def add_preset(self, preset, name: str | None = None) -> "ScanEngine":
+        raw = preset.raw if isinstance(preset, CompiledPreset) else preset
+        return self.add(name or raw.get("name", "preset"), [_rule_expr(r) for r in raw.get("filters", []) or []])
+
+    def add_builtins(self) -> "ScanEngine":
+        from ..agents.pattern_scanner import BUILTIN_RULES, UNIVERSE_GATE, LIQ_GATE
+        for name, rule in BUILTIN_RULES.items():
+            self.add(name, rule["filters"], need=rule["need"], gates=(UNIVERSE_GATE, LIQ_GATE))
+        return self
+
+    def _reach(self, roots) -> list[int]:
+        seen, stack = set(), list(roots)
+        while stack:
+            i = stack.pop()
+            if i in seen: continue
+            seen.add(i); stack.extend(self.dag.nodes[i][2])
+        return sorted(seen)
+
+    def _plan(self, columns: frozenset[str]):
+        """Per column-set: which scans run, their effective roots, and the nodes to evaluate."""
+        plan = self._plans.get(columns)
+        if plan is None:
+            with self._lock:                   # _and() may intern new nodes
+                active, roots = [], []
+                for j, s in enumerate(self.scans):
+                    if not s.need <= columns: continue
+                    ids = [s.root] + [g for c, g in s.gates if c <= columns]
+                    active.append(j); roots.append(self.dag._and(ids))
+                plan = self._plans[columns] = (active, roots, self._reach(roots))
+        return plan
+
+    def _conjuncts(self, i: int) -> list[int]:
+        kind, _, ch = self.dag.nodes[i]
+        return [k for c in ch for k in self._conjuncts(c)] if kind == "and" else [i]
+
+    def _coarse_plan(self, columns: frozenset[str]):
+        """Per column-set: each scan's conjuncts (gates included) that read only these columns."""
+        plan = self._coarse.get(columns)
+        if plan is None:
+            parts, cols = [], {}
+            for s in self.scans:
+                ids = self._conjuncts(s.root) + [k for _, g in s.gates for k in self._conjuncts(g)]
+                for k in ids:
+                    if k not in cols:
+                        cols[k] = {self.dag.nodes[i][1] for i in self._reach([k]) if self.dag.nodes[i][0] == "col"}
+                parts.append([k for k in dict.fromkeys(ids) if cols[k] <= columns])
+            used = sorted({k for p in parts for k in p})
+            plan = self._coarse[columns] = (parts, {k: cols[k] for k in used}, self._reach(used))
+        return plan
+
+    def prefilter(self, df: pd.DataFrame) -> np.ndarray:
+        """Phase one of a two-phase scan: rows that may still match some scan, judged on df's columns.
+
+        Every scan is cut down to its conjuncts over columns df has; a conjunct whose inputs are NaN on
+        a row counts as passed (unknown until the fine pass). The result is a superset of the rows a
+        full scan of the enriched frame would hit, so only those rows need the expensive fetches --
+        provided every column df does carry means the same as in the enriched frame (providers drop
+        the ones they compute differently, e.g. polygon.COARSE_DIVERGENT).
+        """
+        n = len(df)
+        if not n or not self.scans: return np.zeros(n, dtype=bool)
+        parts, need, order = self._coarse_plan(frozenset(df.columns))
+        cols = column_arrays(df, set().union(*need.values()))
+        vals: dict[int, object] = {}
+        with np.errstate(all="ignore"):
+            for i in order:
+                vals[i] = self._eval(self.dag.nodes[i], vals, cols)
+        ok = {}
+        for k, used in need.items():
+            m = np.broadcast_to(np.asarray(vals[k], dtype=bool), (n,)).copy()
+            for c in used:
+                if c not in STRING_COLUMNS: m |= np.isnan(cols[c])
+            ok[k] = m
+        out = np.zeros(n, dtype=bool)
+        for p in parts:
+            out |= np.logical_and.reduce([ok[k] for k in p]) if p else True
+        return out
+
+    def scan(self, df: pd.DataFrame) -> ScanResult:
+        names = [s.name for s in self.scans]
+        plan = self._plan(frozenset(df.columns))
+        skipped = [names[j] for j in range(len(names)) if j not in set(plan[0])]
+        cols = column_arrays(df, self._columns(plan)) if len(df) and plan[0] else {}
+        return ScanResult(names, self._evaluate(cols, len(df), plan), df.index, skipped)
+
+    def _columns(self, plan) -> set[str]:
+        return {self.dag.nodes[i][1] for i in plan[2] if self.dag.nodes[i][0] == "col"}
+
+    def _evaluate(self, cols: dict, n: int, plan) -> np.ndarray:
+        """hits[n, scans] for `n` rows of column arrays, under a plan from _plan()."""
+        active, roots, order = plan
+        hits = np.zeros((n, len(self.scans)), dtype=bool)
+        if n and active:
+            vals: dict[int, object] = {}
+            with np.errstate(all="ignore"):
+                for i in order:
+                    vals[i] = self._eval(self.dag.nodes[i], vals, cols)
+            for j, r in zip(active, roots):
+                hits[:, j] = np.broadcast_to(np.asarray(vals[r], dtype=bool), (n,))
+        return hits
+
+    @staticmethod
+    def _eval(node: _Node, vals: dict, cols: dict):
+        kind, payload, ch = node
+        if kind == "col": return cols[payload]
+        if kind == "const": return payload[1]
+        a = [vals[c] for c in ch]
+        if kind == "and": return np.logical_and.reduce(np.broadcast_arrays(*a)) if len(a) > 1 else a[0]
+        if kind == "or": return np.logical_or.reduce(np.broadcast_arrays(*a)) if len(a) > 1 else a[0]
+        if kind == "not": return np.logical_not(a[0])
+        if kind == "neg": return np.negative(a[0])
+        if kind == "bin": return _BIN_FN[payload](a[0], a[1])
+        if kind == "cmp": return _CMP_FN[payload](a[0], a[1])
+        if kind == "call": return _FUNCS[payload][0](*a)
+        raise PresetError(f"bad node {kind}")
+
+    def columns(self) -> frozenset[str]:
+        """Every column a scan or gate can read: a frame projected to these scans the same."""
+        out = set()
+        for s in self.scans:
+            out |= s.need
+            for c, _ in s.gates: out |= c
+        return frozenset(out)
+
+    def stats(self) -> dict:
+        return {"scans": len(self.scans), "nodes": len(self.dag.nodes)}
+
+FULL_RESCAN_FRAC = float(os.getenv("FULL_RESCAN_FRAC", "0.5"))   # IncrementalScan: above this dirty share, scan all rows
+
+@dataclass(frozen=True)
+class ScanEvent:
+    kind: str           # "enter" | "exit"
+    ticker: str
+    scan: str
+
+class IncrementalScan:
+    """Tick-to-tick scanning that re-evaluates only rows whose inputs changed.
+
+    Rows are matched to the previous tick by `key`; a row is dirty if it is new or any column the
+    plan reads differs (NaN == NaN). Clean rows keep last tick's hits. Membership changes come back
+    as enter/exit events, so "newly qualified" needs no extra pass. A changed column set or a new
+    engine (rebind) forces one full pass; a frame with duplicate keys is scanned in full, untracked.
+    """
+    def __init__(self, engine: ScanEngine, key: str = "ticker"):
+        self.engine = engine
+        self.key = key
+        self._keys: pd.Index | None = None
+        self._names: list[str] = []
+        self._hits = np.zeros((0, 0), dtype=bool)
+        self._cols: dict[str, np.ndarray] = {}
+        self._columns: frozenset | None = None
+        self.last = {"rows": 0, "dirty": 0}
+
+    def rebind(self, engine: ScanEngine) -> "IncrementalScan":
+        """Switch engines (preset reload) without losing membership: next scan is a full pass."""
+        if engine is not self.engine:
+            self.engine, self._columns = engine, None
+        return self
+
+    def reset(self):
+        self._keys, self._columns = None, None
+
+    def _prev(self, names: list[str]) -> np.ndarray:
+        """Last tick's hits with columns re-ordered to `names` (scans added by a reload start empty)."""
+        if self._names == names: return self._hits
+        out = np.zeros((len(self._hits), len(names)), dtype=bool)
+        at = {k: j for j, k in enumerate(self._names)}
+        for j, k in enumerate(names):
+            if k in at: out[:, j] = self._hits[:, at[k]]
+        return out
+
+    def scan(self, df: pd.DataFrame, dirty=None) -> tuple[ScanResult, list[ScanEvent]]:
+        """Scan `df`; `dirty` (bool per row) overrides change detection when the feed already knows."""
+        eng = self.engine
+        if self.key not in df.columns:
+            self.reset()
+            return eng.scan(df), []
+        keys = pd.Index(df[self.key])
+        n = len(keys)
+        same_order = self._keys is not None and keys.equals(self._keys)
+        if same_order:                                  # the usual tick: same tickers, same order
+            at = np.arange(n)
+        elif not keys.is_unique:
+            self.reset()
+            return eng.scan(df), []
+        elif self._keys is not None:
+            at = self._keys.get_indexer(keys)
+        else:
+            at = np.full(n, -1)
+        names = [s.name for s in eng.scans]
+        columns = frozenset(df.columns)
+        plan = eng._plan(columns)
+        need = eng._columns(plan)
+        cols = column_arrays(df, need)
+        prev = self._prev(names) if self._keys is not None else np.zeros((0, len(names)), dtype=bool)
+        known = np.flatnonzero(at >= 0)
+        before = prev if same_order else np.zeros((n, len(names)), dtype=bool)
+        if not same_order: before[known] = prev[at[known]]
+
+        if columns != self._columns:
+            changed = np.ones(n, dtype=bool)
+        elif dirty is not None:
+            changed = np.asarray(dirty, dtype=bool) | (at < 0)
+        else:
+            changed = at < 0
+            for c in need:
+                a, b = cols[c], self._cols[c]
+                b = b if same_order else b[np.maximum(at, 0)]
+                diff = np.flatnonzero(a != b)
+                if c not in STRING_COLUMNS: diff = diff[~(np.isnan(a[diff]) & np.isnan(b[diff]))]   # NaN == NaN
+                changed[diff] = True
+
+        rows = np.flatnonzero(changed)
+        if len(rows) > n * FULL_RESCAN_FRAC:             # mostly dirty: gathering rows costs more than it saves
+            hits = eng._evaluate(cols, n, plan)
+        else:
+            hits = before.copy()
+            hits[rows] = eng._evaluate({c: v[rows] for c, v in cols.items()}, len(rows), plan)
+
+        events = [ScanEvent(kind, keys[i], names[j])
+                  for kind, m in (("enter", hits[rows] & ~before[rows]), ("exit", before[rows] & ~hits[rows]))
+                  for i, j in zip(rows[np.nonzero(m)[0]], np.nonzero(m)[1])]
+        if self._keys is not None and not same_order:   # tickers that dropped out of the snapshot
+            gone = np.flatnonzero(~self._keys.isin(keys))
+            events += [ScanEvent("exit", self._keys[gone[g]], names[j]) for g, j in zip(*np.nonzero(prev[gone]))]
+
+        self._keys, self._names, self._hits, self._cols, self._columns = keys, names, hits, cols, columns
+        self.last = {"rows": n, "dirty": int(len(rows))}
+        skipped = [names[j] for j in range(len(names)) if j not in set(plan[0])]
+        return ScanResult(names, hits, df.index, skipped), events
+
+_engines: dict[tuple, ScanEngine] = {}
+_engines_lock = threading.Lock()
+
+def scan_engine(presets: dict | None = None, builtins: bool = False) -> ScanEngine:
+    """Engine for these presets, rebuilt only when their content changes (keyed on content, not identity)."""
+    presets = presets or {}
+    key = (tuple((k, json.dumps(p.raw if isinstance(p, CompiledPreset) else p, sort_keys=True, default=str))
+                 for k, p in presets.items()), builtins)
+    eng = _engines.get(key)
+    if eng is None:
+        eng = ScanEngine()
+        for path, p in presets.items(): eng.add_preset(p)
+        if builtins: eng.add_builtins()
+        with _engines_lock:
+            _engines.clear()           # keep only the current preset set
+            _engines[key] = eng
+    return eng
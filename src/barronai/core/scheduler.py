@@ -1,24 +1,88 @@
 from __future__ import annotations
-import time, glob, os
+import time, os, math, asyncio
+from concurrent.futures import TimeoutError as FuturesTimeout
 import pandas as pd
 from .utils import now_et, is_power_hour
-from .preset_loader import load_yaml, run_preset
-from ..agents.signal_builder import SignalBuilder
+from .preset_registry import preset_registry, PRESET_WATCH
+from .scan_engine import IncrementalScan
+from .ranker import top_k, rank_config, rank_columns, priority
+from ..agents.signal_builder import SignalBuilder, DEFAULT_WEIGHTS
 from ..agents.risk_engine import RiskEngine, RiskConfig
 from ..agents.trade_executor import TradeExecutor
 from ..agents.journal import journal_signal, journal_plan
 from .config import settings
-from ..data.provider import get_provider
+from ..data.provider import get_provider, submit
 from ..nlp.catalyst_nlp import fetch_news as fetch_yf_news, score_catalyst
 from ..nlp.benzinga import fetch_benzinga
 from ..integrations.alerts import maybe_alert
 
 WATCHLIST = os.getenv("WATCHLIST","AAPL,AMD,TSLA,NVDA,PLTR,SOFI").split(",")
 PROVIDER = os.getenv("PROVIDER","yahoo").lower()
+UNIVERSE = os.getenv("UNIVERSE","watchlist").lower()  # "market" = whole-market bulk snapshot
+SCAN_BUILTINS = os.getenv("SCAN_BUILTINS","0") in {"1","true","True","YES","yes"}  # also run pattern_scanner scans
+TICK_FIELDS = frozenset({"ticker","last"})      # what tick_once always reads from a row
+STRUCTURE_FIELDS = frozenset({"vwap","ema20"})  # structure bonus (last above both); asked for while it is weighted
+PLAN_FIELDS = frozenset({"atr"})                # ATR-sized stops; without it make_plan uses a 2% stop
+# 0 = don't ask for indicator columns (ema20/atr/vwap) on tick_once's own account; scans can still read them
+TICK_INDICATORS = os.getenv("TICK_INDICATORS","1") in {"1","true","True","YES","yes"}
+TWO_PHASE = os.getenv("TWO_PHASE","1") in {"1","true","True","YES","yes"}   # bulk prefilter before intraday fetches
+FINE_MAX = int(os.getenv("FINE_MAX","300"))   # phase-two cap: highest-priority survivors only
+# 1 = websocket AM/T feed for the watchlist + open positions: pushed bars land in the BarStore and
+# streamed last/HOD/VWAP replace polled ones in tick rows (data.stream)
+STREAM = os.getenv("STREAM","0") in {"1","true","True","YES","yes"}
+TICK_BUDGET_S = float(os.getenv("TICK_BUDGET_S","30"))   # news + orders per tick; the rest waits for the next one
 
-def market_snapshot() -> pd.DataFrame:
+def two_phase_snapshot(prov, engine, fields=None) -> pd.DataFrame | None:
+    """Cheap bulk rows -> engine.prefilter -> full rows (aggs, indicators) for survivors only.
+    None when the provider has no live bulk snapshot; the caller then does the usual snapshot."""
+    if not (TWO_PHASE and hasattr(prov, "coarse_snapshot")): return None
+    coarse = prov.coarse_snapshot(fields=fields)
+    if coarse.empty: return None
+    if UNIVERSE != "market": coarse = coarse[coarse["ticker"].isin(WATCHLIST)]
+    keep = coarse[engine.prefilter(coarse)]
+    if len(keep) > FINE_MAX:
+        keep = keep.assign(_p=priority(keep)).nlargest(FINE_MAX, "_p")
+    print(now_et(), "phase one", len(coarse), "->", len(keep))
+    if keep.empty: return keep
+    return prov.quote_snapshot(keep["ticker"].tolist(), fields=fields)
+
+def market_snapshot(fields=None, engine=None) -> pd.DataFrame:
+    """Snapshot rows; `fields` limits the columns (and the enrichments) the provider computes.
+    With a scan `engine`, tickers are prefiltered on a bulk snapshot first (two_phase_snapshot)."""
     prov = get_provider(PROVIDER)
-    return prov.quote_snapshot(WATCHLIST)
+    name, path, why = type(prov).__name__, "watchlist", []
+    df = None
+    if engine is not None and TWO_PHASE:
+        df = two_phase_snapshot(prov, engine, fields)
+        if df is not None: path = "two-phase"
+        else: why.append("no coarse_snapshot" if not hasattr(prov, "coarse_snapshot") else "no live bulk snapshot")
+    if df is None and UNIVERSE == "market":
+        if not hasattr(prov, "market_snapshot"): why.append("no market_snapshot")
+        else:
+            df = prov.market_snapshot(fields=fields)
+            if not df.empty: path = "market"
+            else: df = None; why.append("market snapshot empty")
+    if df is None: df = prov.quote_snapshot(WATCHLIST, fields=fields)
+    if STREAM:
+        from ..data.stream import overlay
+        df = overlay(df)
+    print(now_et(), "snapshot:", path, "via", name, len(df), "rows", f"({'; '.join(why)})" if why else "")
+    return df
+
+def tick_fields(signal_weights: dict) -> frozenset:
+    """Columns tick_once reads beyond the scans and the ranker."""
+    if not TICK_INDICATORS: return TICK_FIELDS
+    return TICK_FIELDS | PLAN_FIELDS | (STRUCTURE_FIELDS if signal_weights.get("structure") else frozenset())
+
+def _val(row, col: str) -> float:
+    try: x = float(row.get(col, math.nan))
+    except (TypeError, ValueError): return math.nan
+    return x
+
+def structure_score(row) -> float:
+    """0.6, plus 0.1 when last is at/above both VWAP and EMA20 (no bonus if either is missing)."""
+    last, vwap, ema = _val(row, "last"), _val(row, "vwap"), _val(row, "ema20")
+    return 0.6 + (0.1 if last >= vwap and last >= ema else 0.0)   # NaN compares False
 
 def news_for(ticker: str):
     provider = os.getenv("NEWS_PROVIDER","rss").lower()
@@ -33,31 +97,58 @@ def news_for(ticker: str):
     else:
         return fetch_yf_news(ticker, limit=15)
 
+async def _news(ticker: str) -> list:
+    try: return await asyncio.to_thread(news_for, ticker)
+    except Exception: return []
+
+_scan: IncrementalScan | None = None
+
 def tick_once():
-    df = market_snapshot()
+    global _scan
+    # presets/params are compiled by the registry's watcher; one fused pass over the rows that moved
+    reg = preset_registry(builtins=SCAN_BUILTINS)
+    if PRESET_WATCH: reg.start()      # the live loop owns the watcher; other readers poll mtimes
+    state = reg.current()
+    weights, k = rank_config(state.params)
+    sig_weights = {**DEFAULT_WEIGHTS, **(state.params.get("weights") or {})}
+    # e.g. no float lookups unless a scan reads float, no indicator engine unless something reads ema20/atr
+    fields = state.fields | tick_fields(sig_weights) | rank_columns(weights)
+    df = market_snapshot(fields=fields, engine=state.engine)
+    if "agg_source" in df: df = df[df["agg_source"] != "eod"]   # EOD rows rank the warm-up; never scanned for orders
     if df.empty:
         print(now_et(), "no data"); return
 
-    cand = []
-    for path in glob.glob("scans/presets/*.yml"):
-        preset = load_yaml(path)
-        hits = run_preset(df, preset)
-        if not hits.empty:
-            cand.append(hits)
-    if not cand:
+    _scan = (_scan or IncrementalScan(state.engine)).rebind(state.engine)
+    res, events = _scan.scan(df)
+    entered: dict[str, list[str]] = {}
+    for e in events:
+        if e.kind == "enter": entered.setdefault(e.ticker, []).append(e.scan)
+    if events:
+        print(now_et(), "scan", _scan.last, "entered", sum(map(len, entered.values())),
+              "left", len(events) - sum(map(len, entered.values())))
+    if not res.any().any():
         print(now_et(), "no candidates"); return
 
-    candidates = pd.concat(cand, ignore_index=True).drop_duplicates(subset=["ticker"])
-    sb = SignalBuilder()
+    candidates = top_k(df, res, k, weights)   # best first, one row per ticker
+    t0 = time.monotonic()   # TICK_BUDGET_S covers news + orders only; a slow snapshot must not eat it
+    sb = SignalBuilder(weights=sig_weights)
     rk = RiskEngine(RiskConfig(account_equity=float(os.getenv("ACCOUNT_EQUITY","50000"))))
     ex = TradeExecutor(paper_only=bool(settings.PAPER_ONLY))
+    left = lambda: TICK_BUDGET_S - (time.monotonic() - t0)
+    news = {t: submit(_news(t)) for t in candidates["ticker"]}   # all in flight; consumed best-first
 
-    for _, row in candidates.iterrows():
-        items = news_for(row["ticker"])
+    for n, (_, row) in enumerate(candidates.iterrows()):
+        if left() <= 0:
+            print(now_et(), "tick budget spent;", len(candidates) - n, "lower-ranked candidates deferred"); break
+        try: items = news[row["ticker"]].result(timeout=max(0.0, left()))
+        except FuturesTimeout:
+            print(now_et(), row["ticker"], "news not back within the tick budget; deferred"); continue
         cat = score_catalyst(items)
         sig = sb.build(
-            ticker=row["ticker"], structure_score=0.6 + (0.1 if (float(row.get("last",0))>=float(row.get("vwap",1)) and float(row.get("last",0))>=float(row.get("ema20",1))) else 0.0), catalyst_score=cat["score"], narrative_score=0.4,
-            reasons={"catalyst_reason": cat["reason"], "examples": cat["examples"][:5]}
+            ticker=row["ticker"], structure_score=structure_score(row), catalyst_score=cat["score"], narrative_score=0.4,
+            reasons={"catalyst_reason": cat["reason"], "examples": cat["examples"][:5],
+                     "new_in": entered.get(row["ticker"], []), "presets": row["presets"],
+                     "rank_score": float(row["rank_score"])}
         )
         journal_signal(sig)
         _ = maybe_alert(sig, reasons=sig.reasons)
@@ -65,17 +156,32 @@ def tick_once():
         if not rk.can_enter():
             print(now_et(), row["ticker"], "blocked by risk/circuit"); continue
 
-        plan = rk.make_plan(entry=float(row["last"]), atr=float(row.get("atr", 0.0) or 0.0))
+        atr = _val(row, "atr")
+        plan = rk.make_plan(entry=float(row["last"]), atr=0.0 if math.isnan(atr) else atr)
         journal_plan(row["ticker"], plan)
         order = ex.submit_bracket(symbol=row["ticker"], qty=plan.size_shares,
                                   entry=float(row["last"]), stop=plan.stop, take=plan.tp1)
         print(now_et(), row["ticker"], "score=", sig.score, "|", order.get("status"))
+    for f in news.values(): f.cancel()   # deferred tickers: don't hold the news pool
+
+def maybe_start_stream():
+    """With STREAM=1: start (or extend) the process stream for the watchlist plus open positions."""
+    if not STREAM: return None
+    from ..data.stream import start_stream
+    held = TradeExecutor(paper_only=bool(settings.PAPER_ONLY)).open_symbols()
+    return start_stream(dict.fromkeys([t.upper() for t in WATCHLIST] + held))
 
 def run_loop(interval_seconds: int = 60):
+    from .warmup import in_warm_window, rank, warm, WARM_INTERVAL_S
+    warmed_at = 0.0
     while True:
         now = now_et()
         if is_power_hour(now):
+            maybe_start_stream()      # no-op unless STREAM=1; picks up positions opened since last tick
             tick_once()
+        elif in_warm_window(now) and time.time() - warmed_at >= WARM_INTERVAL_S:
+            print(now, "pre-open warm-up", warm(rank(WATCHLIST, UNIVERSE)))  # also seeds this process's BarStore
+            warmed_at = time.time()
         else:
             print(now, "outside power hours — idle")
         time.sleep(interval_seconds)
@@ -0,0 +1,52 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+import pandas as pd
+from barronai.core import scheduler as sc
+from barronai.core.scan_engine import scan_engine
+
+# one row that hits basic_gainer (and passes the universe/liquidity gates)
+ROWS = pd.DataFrame([
+    {"ticker": "ABC", "last": 4.2, "float": 9_000_000, "pct_change": 18, "volume": 1_200_000, "day_high": 4.25,
+     "vwap": 4.1, "ema20": 4.0, "atr": 0.1, "spread_pct": 0.5, "dollar_volume": 5_000_000, "rel_volume": 3.1},
+])
+
+class _Executor:
+    orders: list = []
+    def __init__(self, **kw): pass
+    def submit_bracket(self, **kw):
+        self.orders.append(kw["symbol"]); return {"status": "paper"}
+
+class _Risk:
+    def __init__(self, cfg): pass
+    def can_enter(self): return True
+    def make_plan(self, entry, atr=None):
+        return SimpleNamespace(size_shares=10, stop=entry - 0.1, tp1=entry + 0.1)
+
+async def _no_news(ticker):
+    return []
+
+def _tick(snapshot_s: float, budget_s: float) -> list:
+    engine = scan_engine({}, builtins=True)
+    state = SimpleNamespace(params={}, fields=engine.columns(), engine=engine)
+    reg = SimpleNamespace(start=lambda: None, current=lambda: state)
+    def slow_snapshot(fields=None, engine=None):
+        time.sleep(snapshot_s); return ROWS
+    _Executor.orders = []
+    with mock.patch.multiple(sc, preset_registry=lambda builtins=False: reg, market_snapshot=slow_snapshot,
+                             _news=_no_news, TradeExecutor=_Executor, RiskEngine=_Risk, TICK_BUDGET_S=budget_s,
+                             journal_signal=lambda sig: None, journal_plan=lambda t, p: None,
+                             maybe_alert=lambda sig, reasons=None: None, _scan=None):
+        sc.tick_once()
+    return _Executor.orders
+
+def test_slow_snapshot_keeps_news_and_order_budget():
+    # the snapshot alone takes longer than the whole tick budget; candidates must still be acted on
+    assert _tick(snapshot_s=0.3, budget_s=0.2) == ["ABC"]
+
+def main():
+    test_slow_snapshot_keeps_news_and_order_budget()
+    print("TICK BUDGET: ok")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import os, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime
+import pandas as pd
+from .utils import now_et, ET
+from .ranker import priority
+
+# Pre-open warm-up: fill the shared disk caches (floats, daily history, news, today's aggs) so the
+# first ticks after the open run warm. Everything goes through the rate limiter, so run it with
+# RATE_PRIORITY=background (scripts/warm_cache.py does) to leave headroom for the live loop.
+WARM_START = os.getenv("WARM_START", "07:00")      # ET
+WARM_END = os.getenv("WARM_END", "09:30")          # ET; a last pass runs just before this
+WARM_INTERVAL_S = int(os.getenv("WARM_INTERVAL_S", "600"))
+WARM_FINAL_S = 120                                  # final aggs/news refresh this long before WARM_END
+WARM_MAX_WORKERS = int(os.getenv("WARM_MAX_WORKERS", "8"))
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "200"))    # with UNIVERSE=market: how many movers to warm
+TASKS = ("float", "daily", "news", "aggs")
+
+def _hhmm(s: str) -> dtime:
+    h, m = s.split(":")
+    return dtime(int(h), int(m), tzinfo=ET)
+
+def in_warm_window(now: datetime | None = None) -> bool:
+    t = (now or now_et()).timetz()
+    return _hhmm(WARM_START) <= t < _hhmm(WARM_END)
+
+def rank(tickers: list[str], universe: str = "watchlist") -> list[str]:
+    """Tickers ordered by pre-market gap and volume, from one cheap bulk read; input order on failure."""
+    from ..data.providers import polygon as pg
+    df = pd.DataFrame()
+    try:
+        if pg.SNAPSHOT_OK and os.getenv("POLYGON_API_KEY"):
+            df = pg._bulk_snapshot()
+        elif universe == "market" and os.getenv("POLYGON_API_KEY"):
+            df = pg._bulk_grouped()        # last session's EOD: fine for ordering the warm-up, never for trading
+        elif tickers:
+            from ..data.providers.yahoo import batch_snapshot
+            df = batch_snapshot(tickers)
+    except Exception as e:
+        pg._log("warmup rank failed; using input order", e)
+    if df.empty: return list(tickers)
+    if universe != "market": df = df[df["ticker"].isin(tickers)]
+    df = df.assign(_p=priority(df)).sort_values("_p", ascending=False)
+    ranked = df["ticker"].tolist()
+    if universe == "market": ranked = ranked[:WARM_TOP_N]
+    return ranked + [t for t in tickers if t not in set(ranked)]
+
+def _task(kind: str, t: str):
+    from ..data.providers import polygon as pg
+    if kind == "float": return pg._reference_float(t)
+    if kind == "daily": return pg._daily_history(t)
+    if kind == "news":
+        from .scheduler import news_for
+        return news_for(t)
+    if kind == "aggs": return pg._aggs_today_cached(t)
+
+def warm(tickers: list[str], tasks=TASKS, max_workers: int = WARM_MAX_WORKERS) -> dict:
+    """Run every task for every ticker on a bounded pool, highest-priority tickers first."""
+    from ..data.float_enricher import reference_store
+    jobs = [(k, t) for t in tickers for k in tasks]
+    def run(job) -> tuple[str, bool]:
+        try: _task(*job); return job[0], True
+        except Exception: return job[0], False
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="warm") as pool:
+        results = list(pool.map(run, jobs))
+    done = Counter(k for k, ok in results if ok)
+    failed = Counter(k for k, ok in results if not ok)
+    reference_store().save()
+    return {"tickers": len(tickers), "done": dict(done), "failed": dict(failed), "secs": round(time.time() - t0, 2)}
+
+def run_until_open(tickers: list[str], universe: str = "watchlist", log=print):
+    """Warm every WARM_INTERVAL_S inside the window; one last aggs/news pass right before the open."""
+    while True:
+        now = now_et()
+        if not in_warm_window(now):
+            log(now, "outside warm-up window"); return
+        left = (datetime.combine(now.date(), _hhmm(WARM_END)) - now).total_seconds()
+        order = rank(tickers, universe)
+        if left <= WARM_FINAL_S:
+            log(now, "final warm", warm(order, tasks=("news", "aggs"))); return
+        log(now, "warm", warm(order))
+        time.sleep(max(1.0, min(WARM_INTERVAL_S, left - WARM_FINAL_S)))
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import os, threading
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from .providers.polygon import BAR_DTYPE, _bars_to_array, _get, _log
+
+# Historical 1m bars, one structured .npy per ticker per session day: {LAKE_DIR}/{TICKER}/{YYYY-MM-DD}.npy
+LAKE_DIR = Path(os.getenv("BAR_LAKE_DIR", "tmp/lake/minute"))
+LAKE_OFFLINE = os.getenv("BAR_LAKE_OFFLINE", "0") in {"1","true","True","YES","yes"}  # read-only, never fetch
+LAKE_CHUNK_DAYS = 30          # one aggs request covers at most this many missing days (~50k bar limit)
+MARKET_TZ = ZoneInfo("America/New_York")
+
+def _ms(x) -> int:
+    """Epoch ms of an ISO date/datetime: bare dates are New York midnight, naive datetimes are UTC."""
+    if isinstance(x, datetime): d = x
+    elif isinstance(x, date): d = datetime.combine(x, datetime.min.time(), MARKET_TZ)
+    else:
+        d = datetime.fromisoformat(str(x))
+        if len(str(x)) <= 10: d = d.replace(tzinfo=MARKET_TZ)     # 'YYYY-MM-DD' is a market date
+    if d.tzinfo is None: d = d.replace(tzinfo=timezone.utc)
+    return int(d.timestamp() * 1000)
+
+def _day(x) -> date:
+    """Market (New York) date of an ISO date/datetime (see _ms for how naive values are read)."""
+    return datetime.fromtimestamp(_ms(x) / 1000, MARKET_TZ).date()
+
+def _days(start, end) -> list[date]:
+    """Weekdays from start to end inclusive (market dates); holidays are stored as empty partitions."""
+    s, e = _day(start), _day(end)
+    out = []
+    while s <= e:
+        if s.weekday() < 5: out.append(s)
+        s += timedelta(days=1)
+    return out
+
+def _runs(days: list[date]) -> list[tuple[date, date]]:
+    """Group days into consecutive ranges of at most LAKE_CHUNK_DAYS calendar days."""
+    runs = []
+    for d in days:
+        if runs and (d - runs[-1][1]).days <= 3 and (d - runs[-1][0]).days < LAKE_CHUNK_DAYS:
+            runs[-1][1] = d
+        else:
+            runs.append([d, d])
+    return [(a, b) for a, b in runs]
+
+class BarLake:
+    """Local minute-bar history partitioned by ticker and session date.
+
+    Completed days are written once and read back memory-mapped; the current session is always
+    fetched live and never persisted (it is still growing).
+    """
+    def __init__(self, root: Path = LAKE_DIR, offline: bool = LAKE_OFFLINE):
+        self.root = Path(root)
+        self.offline = offline
+        self.fetches = 0
+
+    def path(self, ticker: str, day: date) -> Path:
+        return self.root / ticker.upper() / f"{day.isoformat()}.npy"
+
+    def has(self, ticker: str, day: date) -> bool:
+        return self.path(ticker, day).exists()
+
+    def missing(self, ticker: str, start, end) -> list[date]:
+        today = datetime.now(MARKET_TZ).date()
+        return [d for d in _days(start, end) if d < today and not self.has(ticker, d)]
+
+    def _fetch(self, ticker: str, a: date, b: date) -> pd.DataFrame:
+        res = _get(f"/v2/aggs/ticker/{ticker.upper()}/range/1/minute/{a.isoformat()}/{b.isoformat()}",
+                   {"adjusted":"true", "sort":"asc", "limit":"50000"})
+        rows = list(res.get("results") or [])
+        nxt = res.get("next_url")
+        while nxt:
+            path = nxt.split("api.polygon.io", 1)[-1]
+            res = _get(path); rows += res.get("results") or []
+            nxt = res.get("next_url")
+        self.fetches += 1
+        return pd.DataFrame(rows)
+
+    def _write(self, ticker: str, day: date, arr: np.ndarray):
+        p = self.path(ticker, day)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as fh: np.save(fh, arr, allow_pickle=False)
+        tmp.replace(p)
+
+    def _split_days(self, df: pd.DataFrame) -> dict[date, np.ndarray]:
+        if df.empty or "t" not in df: return {}
+        arr = _bars_to_array(df)
+        arr = arr[np.argsort(arr["t"], kind="stable")]
+        days = pd.to_datetime(arr["t"], unit="ms", utc=True).tz_convert(MARKET_TZ).date
+        out = {}
+        for d in np.unique(days):
+            out[d] = arr[days == d]
+        return out
+
+    def sync(self, ticker: str, start, end) -> dict:
+        """Fetch only the completed days missing from the lake (weekends skipped, empty days kept empty).
+
+        Days whose fetch failed are not written and come back in `failed_days` (ISO dates).
+        """
+        if self.offline: return {"ticker": ticker.upper(), "fetched_days": 0, "failed_days": [], "requests": 0}
+        todo = self.missing(ticker, start, end)
+        reqs, failed = 0, []
+        for a, b in _runs(todo):
+            try: df = self._fetch(ticker, a, b)
+            except Exception as e:
+                _log("lake fetch failed", ticker, a, b, e)
+                failed += [d.isoformat() for d in todo if a <= d <= b]
+                continue
+            reqs += 1
+            parts = self._split_days(df)
+            for d in todo:
+                if a <= d <= b:
+                    self._write(ticker, d, parts.get(d, np.empty(0, dtype=BAR_DTYPE)))
+        return {"ticker": ticker.upper(), "fetched_days": len(todo) - len(failed), "failed_days": failed,
+                "requests": reqs}
+
+    def arrays(self, ticker: str, start, end) -> np.ndarray:
+        """Bars for the day range as one structured array (mmap'd partitions, concatenated once)."""
+        today = datetime.now(MARKET_TZ).date()
+        parts = []
+        for d in _days(start, end):
+            p = self.path(ticker, d)
+            if p.exists():
+                try: parts.append(np.load(p, mmap_mode="r", allow_pickle=False))
+                except Exception as e: _log("lake read failed", p, e)
+            elif d >= today and not self.offline:
+                try: parts.extend(self._split_days(self._fetch(ticker, d, d)).values())
+                except Exception as e: _log("lake live fetch failed", ticker, d, e)
+        parts = [a for a in parts if len(a)]
+        if not parts: return np.empty(0, dtype=BAR_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def load(self, ticker: str, start, end, sync: bool = True) -> pd.DataFrame:
+        """Ascending bars (t,o,h,l,c,v,vw,n) between start and end (ISO dates/datetimes; naive = UTC)."""
+        if sync: self.sync(ticker, start, end)
+        arr = self.arrays(ticker, start, end)
+        lo, hi = _ms(start), _ms(end)
+        t = arr["t"]
+        arr = arr[np.searchsorted(t, lo):np.searchsorted(t, hi, side="right")]
+        if not len(arr): return pd.DataFrame()
+        return pd.DataFrame({f: arr[f] for f in BAR_DTYPE.names})
+
+_lake: BarLake | None = None
+
+def bar_lake() -> BarLake:
+    global _lake
+    if _lake is None:
+        _lake = BarLake()
+    return _lake
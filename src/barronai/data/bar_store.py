@@ -0,0 +1,198 @@
+from __future__ import annotations
+import os, time, threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+BAR_FIELDS = ("t", "o", "h", "l", "c", "v", "vw")
+STORE_CAPACITY = int(os.getenv("BAR_STORE_CAPACITY", "960"))        # 1m bars kept per ticker
+STORE_MAX_TICKERS = int(os.getenv("BAR_STORE_MAX_TICKERS", "1000"))  # LRU beyond this
+RING_MIN_ALLOC = 64                                                   # bars allocated up front; doubles up to capacity
+
+class _Ring:
+    """Bounded bars for one ticker.
+
+    Every value is written twice (slot i and i+alloc), so the newest n bars are always one contiguous
+    slice and views never need to copy or wrap. Storage starts at RING_MIN_ALLOC bars and doubles
+    until it reaches cap (always before the first wrap), so a ticker with a few bars stays small.
+    """
+    __slots__ = ("cap", "alloc", "cols", "count", "updated", "seeded")
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.count = 0
+        self._alloc(min(cap, RING_MIN_ALLOC))
+        self.updated = 0.0
+        self.seeded = False   # holds the day's history from a REST/cache backfill, not just pushed bars
+
+    def _alloc(self, size: int):
+        """(Re)allocate `size` slots, keeping the bars held so far (count < size: nothing has wrapped)."""
+        old, n = getattr(self, "cols", None), self.count
+        self.alloc = size
+        self.cols = {f: np.zeros(2 * size, dtype=np.int64 if f == "t" else np.float64) for f in BAR_FIELDS}
+        if old and n:
+            for f, col in self.cols.items():
+                col[:n] = old[f][:n]; col[size:size + n] = old[f][:n]
+
+    def __len__(self) -> int:
+        return min(self.count, self.cap)
+
+    def _end(self) -> int:
+        return (self.count - 1) % self.alloc + self.alloc + 1
+
+    def last_t(self) -> int | None:
+        return int(self.cols["t"][self._end() - 1]) if self.count else None
+
+    def write(self, row: tuple, replace: bool):
+        if replace and self.count:
+            i = (self.count - 1) % self.alloc
+        else:
+            if self.count == self.alloc < self.cap: self._alloc(min(2 * self.alloc, self.cap))
+            i = self.count % self.alloc
+            self.count += 1
+        for f, x in zip(BAR_FIELDS, row):
+            col = self.cols[f]; col[i] = x; col[i + self.alloc] = x
+
+    def fill(self, cols: dict[str, np.ndarray]):
+        """Bulk-load an empty ring from ascending, de-duplicated columns (at most cap long)."""
+        n = len(cols["t"])
+        if n > self.alloc:
+            size = self.alloc
+            while size < n: size *= 2
+            self._alloc(min(size, self.cap))
+        for f, col in self.cols.items():
+            col[:n] = cols[f]; col[self.alloc:self.alloc + n] = cols[f]
+        self.count = n
+
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.cols.values())
+
+    def view(self, n: int | None = None) -> dict[str, np.ndarray]:
+        k = len(self) if n is None else max(0, min(n, len(self)))
+        end = self._end() if self.count else self.alloc
+        out = {}
+        for f, col in self.cols.items():
+            v = col[end - k:end]; v.flags.writeable = False
+            out[f] = v
+        return out
+
+class BarStore:
+    """Process-wide per-ticker minute bars (t,o,h,l,c,v,vw) in NumPy ring buffers.
+
+    view()/frame() return copies by default. view(copy=False) gives read-only slices of the live
+    buffers: no copy, but the next write to that ticker changes them, so only use them within a tick.
+    """
+    def __init__(self, capacity: int = STORE_CAPACITY, max_tickers: int = STORE_MAX_TICKERS):
+        self.capacity = capacity
+        self.max_tickers = max_tickers
+        self._rings: OrderedDict[str, _Ring] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _ring(self, ticker: str, create: bool = False) -> _Ring | None:
+        key = ticker.upper()
+        r = self._rings.get(key)
+        if r is not None:
+            self._rings.move_to_end(key)
+        elif create:
+            r = self._rings[key] = _Ring(self.capacity)
+            while len(self._rings) > self.max_tickers:
+                self._rings.popitem(last=False)
+        return r
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self._rings
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def tickers(self) -> list[str]:
+        return list(self._rings)
+
+    def append(self, ticker: str, bar: dict):
+        """Add one bar; a bar with the latest t replaces it (still-forming minute), older ones are dropped."""
+        with self._lock:
+            r = self._ring(ticker, create=True)
+            last = r.last_t()
+            t = int(bar["t"])
+            if last is not None and t < last: return
+            r.write(tuple(bar.get(f, np.nan) for f in BAR_FIELDS), replace=(t == last))
+            r.updated = time.time()
+
+    def extend(self, ticker: str, df: pd.DataFrame, seeded: bool = True):
+        """Merge a frame of bars (any order). Bars newer than the store are appended; if the frame
+        carries history the store lacks, the ticker is rebuilt from the union."""
+        if df is None or df.empty or "t" not in df: return
+        cols = {f: (pd.to_numeric(df[f], errors="coerce").to_numpy(np.int64 if f == "t" else np.float64)
+                    if f in df else np.full(len(df), np.nan)) for f in BAR_FIELDS}
+        order = np.argsort(cols["t"], kind="stable")
+        cols = {f: a[order] for f, a in cols.items()}
+        with self._lock:
+            r = self._ring(ticker, create=True)
+            have = r.view()
+            last = r.last_t()
+            older = cols["t"][cols["t"] < last] if last is not None else cols["t"][:0]
+            if len(older) and not np.isin(older, have["t"]).all():
+                merged = pd.concat([pd.DataFrame({f: a.copy() for f, a in have.items()}),
+                                    pd.DataFrame(cols)], ignore_index=True)
+                merged = merged.drop_duplicates("t", keep="last").sort_values("t")
+                r = self._rings[ticker.upper()] = _Ring(self.capacity)
+                cols = {f: merged[f].to_numpy() for f in BAR_FIELDS}
+                last = None
+            if r.count == 0:
+                keep = np.append(cols["t"][1:] != cols["t"][:-1], True)[-self.capacity:]  # last dup wins
+                r.fill({f: a[-self.capacity:][keep] for f, a in cols.items()})
+                start = len(cols["t"])
+            else:
+                start = int(np.searchsorted(cols["t"], last))
+            for i in range(start, len(cols["t"])):
+                t = int(cols["t"][i])
+                r.write(tuple(cols[f][i] for f in BAR_FIELDS), replace=(t == r.last_t()))
+            r.updated = time.time()
+            r.seeded = r.seeded or seeded
+
+    def view(self, ticker: str, n: int | None = None, since: int | None = None,
+             copy: bool = True) -> dict[str, np.ndarray]:
+        """Read-only columns, ascending; `since` (ms) trims to bars at/after it. copy=False: live views."""
+        with self._lock:
+            r = self._ring(ticker)
+            if r is None: return {f: np.empty(0) for f in BAR_FIELDS}
+            v = r.view(n)
+            if since is not None:
+                i = int(np.searchsorted(v["t"], since))
+                v = {f: a[i:] for f, a in v.items()}
+            if copy:
+                v = {f: a.copy() for f, a in v.items()}
+                for a in v.values(): a.flags.writeable = False
+        return v
+
+    def frame(self, ticker: str, n: int | None = None, since: int | None = None,
+              desc: bool = False) -> pd.DataFrame:
+        """Bars as an independent DataFrame (a copy; later writes do not show up in it)."""
+        v = self.view(ticker, n, since, copy=False)
+        with self._lock:
+            if desc: v = {f: a[::-1] for f, a in v.items()}
+            return pd.DataFrame({f: a.copy() for f, a in v.items()}) if len(v["t"]) else pd.DataFrame()
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(r.nbytes() for r in self._rings.values())
+
+    def age(self, ticker: str) -> float:
+        """Seconds since the ticker was last written (inf if unknown)."""
+        r = self._rings.get(ticker.upper())
+        return time.time() - r.updated if r is not None and r.count else float("inf")
+
+    def seeded(self, ticker: str) -> bool:
+        r = self._rings.get(ticker.upper())
+        return bool(r and r.seeded)
+
+_store: BarStore | None = None
+_store_lock = threading.Lock()
+
+def bar_store() -> BarStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BarStore()
+    return _store
@@ -1,12 +1,31 @@
 from __future__ import annotations
-from typing import Optional
-import math
+from typing import Optional, Callable, Iterable
+from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import os, json, math, time, threading
 import yfinance as yf
+try:
+    import fcntl
+except Exception:  # non-POSIX: saves only merge within this process
+    fcntl = None
+from ..core.singleflight import coalesced
+from ..core.disk_cache import disk_cache
+from ..core.cassette import cassette
 
+# defaults resolve on first use: {CACHE_ROOT}/reference/floats.json and the cache's "reference" TTL
+REF_PATH = os.getenv("REF_CACHE_PATH")
+REF_TTL_SECONDS = int(os.getenv("REF_CACHE_TTL", "0")) or None
+REF_MISS_TTL_SECONDS = int(os.getenv("REF_MISS_TTL", "3600"))  # lookups that found nothing retry sooner
+REF_AUTOSAVE_SECONDS = 30
+
+def _yf_float_field(info: dict):
+    return info.get("floatShares") or info.get("sharesOutstanding")
+
+@coalesced("yahoo_float")
 def yahoo_float(ticker: str) -> Optional[float]:
     try:
-        info = yf.Ticker(ticker).get_info()
-        f = info.get("floatShares") or info.get("sharesOutstanding")
+        f = cassette().call("yf.info", [ticker], lambda: _yf_float_field(yf.Ticker(ticker).get_info()))
         return float(f) if f else None
     except Exception:
         return None
@@ -20,3 +39,114 @@ def pick_float(*values) -> Optional[float]:
         except Exception:
             continue
     return None
+
+class ReferenceStore:
+    """Per-ticker reference data (float) with a daily TTL, persisted to one JSON file.
+
+    Misses are cached too (float=None) so unknown symbols don't hit the network every tick.
+    Saves merge with whatever other processes wrote meanwhile (newest row wins) and drop expired rows.
+    persist=False (cassette sessions, like the disk cache) keeps it in memory only.
+    """
+    def __init__(self, path: Path | str | None = REF_PATH, ttl_seconds: int | None = REF_TTL_SECONDS,
+                 persist: bool | None = None):
+        self.path = Path(path) if path else disk_cache().path("reference", "floats.json")
+        self.ttl = ttl_seconds or int(disk_cache().ttl("reference"))
+        self.persist = not disk_cache().bypass if persist is None else persist
+        self._rows: dict[str, dict] | None = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = time.time()
+
+    def _data(self) -> dict[str, dict]:
+        with self._lock:
+            if self._rows is None:
+                try: self._rows = json.loads(self.path.read_text()) if self.persist else {}
+                except Exception: self._rows = {}
+            return self._rows
+
+    def get(self, ticker: str) -> dict | None:
+        row = self._data().get(ticker.upper())
+        if row and self._fresh(row):
+            disk_cache().note("reference", "hit")
+            return row
+        disk_cache().note("reference", "miss")
+        return None
+
+    def _fresh(self, row: dict) -> bool:
+        ttl = self.ttl if row.get("float") is not None else min(self.ttl, REF_MISS_TTL_SECONDS)
+        return time.time() - float(row.get("ts", 0)) <= ttl
+
+    def put(self, ticker: str, **fields):
+        with self._lock:
+            self._data()[ticker.upper()] = {**fields, "ts": time.time()}
+            self._dirty = True
+            if time.time() - self._saved_at >= REF_AUTOSAVE_SECONDS:
+                self.save()
+
+    def float_for(self, ticker: str, loader: Callable[[str], Optional[float]] = yahoo_float) -> Optional[float]:
+        row = self.get(ticker)
+        if row is not None:
+            return row.get("float")
+        f = pick_float(loader(ticker))
+        self.put(ticker, float=f)
+        return f
+
+    def cached_floats(self, tickers: Iterable[str]) -> dict[str, Optional[float]]:
+        """Fresh cached floats only; never touches the network."""
+        out = {}
+        for t in tickers:
+            row = self.get(t)
+            if row is not None: out[t] = row.get("float")
+        return out
+
+    def prewarm(self, tickers: Iterable[str], loader: Callable[[str], Optional[float]] = yahoo_float,
+                max_workers: int = 8) -> int:
+        """Fetch floats for every ticker missing/expired in the store; returns how many were loaded."""
+        todo = [t for t in dict.fromkeys(tickers) if self.get(t) is None]
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="refwarm") as pool:
+                list(pool.map(lambda t: self.float_for(t, loader), todo))
+        self.save()
+        return len(todo)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or not self.persist: return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock():
+                    try: disk = json.loads(self.path.read_text())
+                    except Exception: disk = {}
+                    rows = self._data()
+                    for k, row in disk.items():
+                        if float(row.get("ts", 0)) > float(rows.get(k, {}).get("ts", 0)): rows[k] = row
+                    for k in [k for k, row in rows.items() if not self._fresh(row)]: del rows[k]
+                    tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                    tmp.write_text(json.dumps(rows))
+                    tmp.replace(self.path)
+                self._dirty = False
+                self._saved_at = time.time()
+            except Exception:
+                pass
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive flock on {path}.lock: serialises savers of this file only, not the whole cache."""
+        if fcntl is None:
+            yield; return
+        lock = self.path.with_name(self.path.name + ".lock")
+        with open(lock, "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)
+            try:
+                os.utime(lock)          # keep it fresh so the cache sweep never expires a held lock
+                yield
+            finally:
+                fcntl.flock(lk, fcntl.LOCK_UN)
+
+_store: ReferenceStore | None = None
+
+def reference_store() -> ReferenceStore:
+    global _store
+    if _store is None:
+        _store = ReferenceStore()
+    return _store
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import math, threading
+from collections import deque
+import numpy as np
+from .stream import session_bounds
+
+class IndicatorState:
+    """Per-ticker running indicators, O(1) per bar.
+
+    Matches the pandas definitions on one session's ascending 1m bars:
+      ema20      c.ewm(span=20, adjust=False).mean()
+      rel_volume v / v.rolling(30).mean()   (mean of all bars while fewer than 30)
+      vwap       cumsum(vw * v) / cumsum(v)  (bar vw, else (h+l+c)/3)
+      atr        true_range.rolling(14).mean()
+      day_high   h.cummax()
+    A bar with the same t as the previous one replaces it (still-forming minute). Sessions are
+    New York trading dates (04:00-20:00 ET never straddles one; a UTC day would split it).
+    Not thread-safe by itself; IndicatorEngine serialises updates per ticker with `lock`.
+    """
+    EMA_SPAN = 20
+    RVOL_WINDOW = 30
+    ATR_WINDOW = 14
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, bounds: tuple | None = None):
+        self.day, self.start_ms, self.end_ms = bounds or (None, 0, 0)
+        self.n = 0
+        self.last_t: int | None = None
+        self.ema = math.nan
+        self.pv = self.vol = 0.0
+        self.hod = math.nan
+        self.prev_c = math.nan
+        self.last_v = math.nan
+        self.vwin, self.vsum = deque(), 0.0
+        self.trwin, self.trsum = deque(), 0.0
+        self._undo = None
+
+    def _push(self, win: deque, total: float, x: float, size: int) -> tuple[float, float | None]:
+        win.append(x); total += x
+        dropped = win.popleft() if len(win) > size else None
+        if dropped is not None: total -= dropped
+        return total, dropped
+
+    def _rollback(self):
+        (self.n, self.last_t, self.ema, self.pv, self.vol, self.hod, self.prev_c, self.last_v,
+         self.vsum, self.trsum, vdrop, trdrop) = self._undo
+        self.vwin.pop(); self.trwin.pop()
+        if vdrop is not None: self.vwin.appendleft(vdrop)
+        if trdrop is not None: self.trwin.appendleft(trdrop)
+
+    def update(self, t: int, o: float, h: float, l: float, c: float, v: float, vw: float = math.nan):
+        if not self.start_ms <= t < self.end_ms:
+            self.reset(session_bounds(int(t)))
+        elif self.last_t is not None and t < self.last_t:
+            return
+        elif t == self.last_t and self._undo is not None:
+            self._rollback()
+        saved = (self.n, self.last_t, self.ema, self.pv, self.vol, self.hod, self.prev_c, self.last_v,
+                 self.vsum, self.trsum)
+
+        v = 0.0 if v is None or math.isnan(v) else float(v)
+        alpha = 2.0 / (self.EMA_SPAN + 1)
+        self.ema = c if math.isnan(self.ema) else alpha * c + (1 - alpha) * self.ema
+        px = vw if vw is not None and not math.isnan(vw) else (h + l + c) / 3.0
+        self.pv += px * v; self.vol += v
+        self.hod = h if math.isnan(self.hod) else max(self.hod, h)
+        tr = h - l if math.isnan(self.prev_c) else max(h - l, abs(h - self.prev_c), abs(l - self.prev_c))
+        self.vsum, vdrop = self._push(self.vwin, self.vsum, v, self.RVOL_WINDOW)
+        self.trsum, trdrop = self._push(self.trwin, self.trsum, tr, self.ATR_WINDOW)
+        self._undo = saved + (vdrop, trdrop)
+        self.prev_c, self.last_v, self.last_t = c, v, int(t)
+        self.n += 1
+
+    def values(self) -> dict:
+        avg = self.vsum / len(self.vwin) if self.vwin else math.nan
+        return {
+            "ema20": self.ema,
+            "rel_volume": (self.last_v / avg) if avg else math.nan,
+            "vwap": (self.pv / self.vol) if self.vol else math.nan,
+            "atr": (self.trsum / self.ATR_WINDOW) if len(self.trwin) >= self.ATR_WINDOW else math.nan,
+            "day_high": self.hod,
+        }
+
+class IndicatorEngine:
+    """IndicatorState per ticker, fed incrementally from ascending bar columns (e.g. BarStore.view).
+
+    The engine lock only guards the ticker map; each state has its own lock, so syncs for
+    different tickers (polygon's per-ticker pool) run in parallel.
+    """
+    def __init__(self):
+        self._states: dict[str, IndicatorState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, ticker: str) -> IndicatorState:
+        key = ticker.upper()
+        st = self._states.get(key)
+        if st is None:
+            with self._lock:
+                st = self._states.setdefault(key, IndicatorState())
+        return st
+
+    def sync(self, ticker: str, cols: dict[str, np.ndarray]) -> dict:
+        """Consume bars not seen yet (plus the last one, which may have changed); returns values()."""
+        st = self.state(ticker)
+        t = cols["t"]
+        with st.lock:
+            if not len(t): return st.values()
+            day0, s0, _ = session_bounds(int(t[-1]))
+            d0 = int(np.searchsorted(t, s0))   # only the latest session counts
+            start = d0
+            if st.day == day0 and st.last_t is not None:
+                j = int(np.searchsorted(t, st.last_t))
+                if j < len(t) and int(t[j]) == st.last_t and j - d0 == st.n - 1:
+                    start = j          # re-feed the last seen bar (may have changed), then new ones
+                else:
+                    st.reset()         # history we never saw (backfill) -> replay the session
+            else:
+                st.reset()
+            o, h, l, c, v = cols["o"], cols["h"], cols["l"], cols["c"], cols["v"]
+            vw = cols.get("vw")
+            for i in range(start, len(t)):
+                st.update(int(t[i]), float(o[i]), float(h[i]), float(l[i]), float(c[i]), float(v[i]),
+                          float(vw[i]) if vw is not None else math.nan)
+            return st.values()
+
+    def values(self, ticker: str) -> dict:
+        st = self.state(ticker)
+        with st.lock:
+            return st.values()
+
+_engine: IndicatorEngine | None = None
+
+def indicator_engine() -> IndicatorEngine:
+    global _engine
+    if _engine is None:
+        _engine = IndicatorEngine()
+    return _engine
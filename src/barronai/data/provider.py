@@ -1,11 +1,76 @@
 from __future__ import annotations
-from .providers.yahoo import YahooProvider
-from .providers.polygon import PolygonProvider
+import asyncio, os, threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .providers.yahoo import YahooProvider, AsyncYahooProvider
+from .providers.polygon import PolygonProvider, AsyncPolygonProvider
+from .providers.hedged import HedgedProvider
+
+PROVIDER_ASYNC = os.getenv("PROVIDER_ASYNC","0") in {"1","true","True","YES","yes"}
+
+_hedged: HedgedProvider | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+def submit(coro):
+    """Schedule a coroutine on one background event loop per process; returns a concurrent Future."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop.set_default_executor(ThreadPoolExecutor(max_workers=32, thread_name_prefix="provider-io"))
+            threading.Thread(target=_loop.run_forever, name="provider-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+def run_sync(coro):
+    """Run a coroutine to completion from sync code, on the background loop."""
+    return submit(coro).result()
+
+class SyncProvider:
+    """Blocking MarketDataProvider facade over an async provider, for existing callers.
+
+    Bulk snapshots are forwarded like HedgedProvider's: empty frames when the inner provider
+    has none (AsyncYahooProvider), so the scheduler falls back to the watchlist.
+    """
+    def __init__(self, inner):
+        self.inner = inner
+
+    def quote_snapshot(self, tickers, fields=None):
+        return run_sync(self.inner.quote_snapshot(list(tickers), fields))
+
+    def market_snapshot(self, fields=None) -> pd.DataFrame:
+        fn = getattr(self.inner, "market_snapshot", None)
+        return run_sync(fn(fields=fields)) if fn else pd.DataFrame()
+
+    def coarse_snapshot(self, fields=None) -> pd.DataFrame:
+        fn = getattr(self.inner, "coarse_snapshot", None)
+        return run_sync(fn(fields=fields)) if fn else pd.DataFrame()
+
+    def aggs_today(self, ticker: str):
+        return run_sync(self.inner.aggs_today(ticker))
+
+    def news(self, ticker: str, limit: int = 20):
+        return run_sync(self.inner.news(ticker, limit))
+
+def get_async_provider(name: str = "yahoo"):
+    name = (name or "yahoo").lower()
+    if name == "yahoo":
+        return AsyncYahooProvider()
+    if name == "polygon":
+        return AsyncPolygonProvider()
+    raise ValueError(f"Unknown provider {name}")
 
 def get_provider(name: str = "yahoo"):
     name = (name or "yahoo").lower()
+    if PROVIDER_ASYNC:
+        return SyncProvider(get_async_provider(name))
     if name == "yahoo":
         return YahooProvider()
     if name == "polygon":
         return PolygonProvider()
+    if name == "hedged":  # Polygon, hedged by Yahoo when a snapshot runs past Polygon's p95
+        global _hedged
+        if _hedged is None:  # one instance so latency history survives across ticks
+            _hedged = HedgedProvider(PolygonProvider(), YahooProvider(), "polygon", "yahoo")
+        return _hedged
     raise ValueError(f"Unknown provider {name}")
@@ -1,12 +1,44 @@
 from __future__ import annotations
-from typing import Protocol, Iterable
+from typing import Protocol, Iterable, Optional
 import pandas as pd
 
+# `fields` (optional on every snapshot call): the columns the caller will read. None = all of them.
+# Providers skip enrichments whose columns are not wanted and leave those columns out of the frame
+# (absent, not NaN, so scans/gates that would read them are skipped rather than failing every row).
+def wants(fields: Iterable[str] | None, *cols: str) -> bool:
+    return fields is None or any(c in fields for c in cols)
+
+def project(df: pd.DataFrame, fields: Iterable[str] | None) -> pd.DataFrame:
+    if fields is None or df.empty: return df
+    keep = set(fields) | {"ticker", "agg_source", "quote_source"}
+    return df[[c for c in df.columns if c in keep]]
+
 class MarketDataProvider(Protocol):
-    def quote_snapshot(self, tickers: Iterable[str]) -> pd.DataFrame:
-        """Return a row per ticker with at least these columns:
+    def quote_snapshot(self, tickers: Iterable[str], fields: Iterable[str] | None = None) -> pd.DataFrame:
+        """Return a row per ticker with at least these columns (those in `fields`, if given):
         ticker, last, volume, float, day_high, vwap, pct_change,
         spread_pct, dollar_volume, rel_volume, yesterday_volume,
         fifty_two_week_high, atr
         """
         ...
+
+class BulkMarketDataProvider(MarketDataProvider, Protocol):
+    def market_snapshot(self, fields: Iterable[str] | None = None) -> pd.DataFrame:
+        """Same columns as quote_snapshot, for the whole US equities universe in a few calls."""
+        ...
+
+class AsyncMarketDataProvider(Protocol):
+    async def quote_snapshot(self, tickers: Iterable[str], fields: Iterable[str] | None = None) -> pd.DataFrame:
+        """Same columns as MarketDataProvider.quote_snapshot."""
+        ...
+
+    async def aggs_today(self, ticker: str) -> tuple[pd.DataFrame, str]:
+        """Today's 1m bars (t,o,h,l,c,v,vw) sorted desc, plus the source they came from."""
+        ...
+
+    async def reference_float(self, ticker: str) -> Optional[float]:
+        ...
+
+    async def news(self, ticker: str, limit: int = 20) -> list[dict]:
+        """Headline dicts in the nlp.catalyst_nlp.fetch_news shape."""
+        ...
@@ -0,0 +1,200 @@
+from __future__ import annotations
+import os, time, threading
+from collections import deque, Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable
+import pandas as pd
+
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+HEDGE_DEFAULT_S = float(os.getenv("HEDGE_DEFAULT_S", "2.0"))   # hedge delay before the first sample
+HEDGE_MIN_S = float(os.getenv("HEDGE_MIN_S", "0.05"))
+HEDGE_MIN_SAMPLES = 8            # quantile needs this many; before that, HEDGE_BOOTSTRAP_X x the slowest sample
+HEDGE_BOOTSTRAP_X = 2.0
+HEDGE_WINDOW = 200
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "32"))
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+    return _pool
+
+class LatencyTracker:
+    """Rolling latency samples per source (successful calls only)."""
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(source, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, source: str, q: float) -> float | None:
+        with self._lock:
+            xs = sorted(self._samples.get(source, ()))
+        if len(xs) < HEDGE_MIN_SAMPLES: return None
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+    def worst(self, source: str) -> float | None:
+        with self._lock:
+            xs = self._samples.get(source)
+            return max(xs) if xs else None
+
+    def summary(self) -> dict:
+        out = {}
+        for src in list(self._samples):
+            out[src] = {q: self.quantile(src, p) for q, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+        return out
+
+def _call_key(*a, **kw):
+    """Hashable key for a call's arguments (lists/sets normalised so equal requests share it)."""
+    norm = lambda v: tuple(sorted(v)) if isinstance(v, (set, frozenset)) else tuple(v) if isinstance(v, list) else v
+    return tuple(norm(v) for v in a) + tuple((k, norm(v)) for k, v in sorted(kw.items()))
+
+class Hedged:
+    """Call `primary`; if it has not produced a usable answer within its own p95 latency (or it
+    fails), also call `secondary` and return whichever usable answer arrives first.
+
+    At most one primary call per `key(*a, **kw)` is in flight: a caller arriving while one is
+    still running joins it instead of submitting another. A primary that loses the race is not
+    cancelled (it cannot be); when it finishes with a usable answer, `on_late(res, *a, **kw)`
+    gets it so it can land in a cache rather than being thrown away.
+
+    Returns (result, source_name); result is None if neither source produced one.
+    """
+    def __init__(self, name: str, primary: tuple[str, Callable], secondary: tuple[str, Callable],
+                 usable: Callable[[Any], bool] = lambda r: r is not None,
+                 key: Callable[..., Any] = _call_key, on_late: Callable[..., Any] | None = None):
+        self.name = name
+        self.primary, self.secondary = primary, secondary
+        self.usable = usable
+        self.key, self.on_late = key, on_late
+        self.latency = LatencyTracker()
+        self.wins: Counter = Counter()
+        self.hedges = 0
+        self.joined = 0
+        self._inflight: dict[Any, Future] = {}
+        self._late: set[Future] = set()
+        self._lock = threading.Lock()
+
+    def _timed(self, src: str, fn: Callable, a, kw):
+        t0 = time.perf_counter()
+        res = fn(*a, **kw)
+        if self.usable(res): self.latency.record(src, time.perf_counter() - t0)
+        return res
+
+    def hedge_delay(self) -> float:
+        q = self.latency.quantile(self.primary[0], HEDGE_QUANTILE)
+        if q is None:                    # bootstrap: scale the slowest sample so far, never above the default
+            worst = self.latency.worst(self.primary[0])
+            q = HEDGE_DEFAULT_S if worst is None else min(HEDGE_DEFAULT_S, HEDGE_BOOTSTRAP_X * worst)
+        return max(HEDGE_MIN_S, q)
+
+    def _primary_future(self, pool: ThreadPoolExecutor, a, kw) -> Future:
+        """The in-flight primary call for these arguments, submitting one only if none is running."""
+        p_name, p_fn = self.primary
+        k = self.key(*a, **kw)
+        with self._lock:
+            pf = self._inflight.get(k)
+            if pf is not None:
+                self.joined += 1
+                return pf
+            pf = self._inflight[k] = pool.submit(self._timed, p_name, p_fn, a, kw)
+        def _done(f, k=k):
+            with self._lock:
+                if self._inflight.get(k) is f: del self._inflight[k]
+        pf.add_done_callback(_done)
+        return pf
+
+    def _keep_late(self, pf: Future, a, kw):
+        """Hand a losing primary's eventual answer to `on_late` (once per primary call)."""
+        if self.on_late is None: return
+        with self._lock:
+            if pf in self._late: return
+            self._late.add(pf)
+        def _late(f):
+            with self._lock: self._late.discard(f)
+            try: res = f.result()
+            except Exception: return
+            if self.usable(res):
+                try: self.on_late(res, *a, **kw)
+                except Exception: pass
+        pf.add_done_callback(_late)
+
+    def __call__(self, *a, **kw) -> tuple[Any, str | None]:
+        pool = _executor()
+        p_name = self.primary[0]
+        s_name, s_fn = self.secondary
+        pf = self._primary_future(pool, a, kw)
+        futs = {pf: p_name}
+        done, _ = wait(futs, timeout=self.hedge_delay())
+        hedged = False
+        while True:
+            for f in done:
+                src = futs.pop(f)
+                try: res = f.result()
+                except Exception: res = None
+                if self.usable(res):
+                    self.wins[src] += 1
+                    if pf in futs: self._keep_late(pf, a, kw)
+                    return res, src
+            if not hedged:
+                hedged = True
+                self.hedges += 1
+                futs[pool.submit(self._timed, s_name, s_fn, a, kw)] = s_name
+            if not futs:
+                self.wins["none"] += 1
+                return None, None
+            done, _ = wait(futs, return_when=FIRST_COMPLETED)
+
+    def stats(self) -> dict:
+        return {"hedges": self.hedges, "joined": self.joined, "wins": dict(self.wins), "latency": self.latency.summary(),
+                "hedge_delay_s": round(self.hedge_delay(), 4)}
+
+_BULK = ("market_snapshot", "coarse_snapshot")
+
+class HedgedProvider:
+    """Composite MarketDataProvider: primary snapshots, hedged by the secondary on slow ticks.
+
+    Bulk snapshots are hedged only when both sources have them; otherwise they go to the
+    primary alone (Yahoo has no bulk endpoint, so polygon+yahoo hedges watchlist quotes only).
+    """
+    def __init__(self, primary, secondary, primary_name: str = "primary", secondary_name: str = "secondary"):
+        self.primary, self.primary_name = primary, primary_name
+        usable = lambda df: df is not None and not df.empty
+        # repeated ticks for the same watchlist join the primary call still in flight; a late
+        # Polygon answer needs no on_late since its per-ticker bars/float already went to the caches
+        self.hedge = Hedged("quote_snapshot", (primary_name, primary.quote_snapshot),
+                            (secondary_name, secondary.quote_snapshot), usable=usable)
+        self.bulk = {m: Hedged(m, (primary_name, getattr(primary, m)), (secondary_name, getattr(secondary, m)),
+                               usable=usable)
+                     for m in _BULK if hasattr(primary, m) and hasattr(secondary, m)}
+
+    def quote_snapshot(self, tickers, fields=None) -> pd.DataFrame:
+        df, src = self.hedge(list(tickers), fields=fields)
+        if df is None: return pd.DataFrame()
+        return df.assign(quote_source=src)
+
+    def _bulk(self, method: str, fields=None) -> pd.DataFrame:
+        if method in self.bulk:
+            df, src = self.bulk[method](fields=fields)
+        else:
+            fn = getattr(self.primary, method, None)
+            df, src = (fn(fields=fields) if fn else None), self.primary_name
+        if df is None or df.empty: return pd.DataFrame()
+        return df.assign(quote_source=src)
+
+    def market_snapshot(self, fields=None) -> pd.DataFrame:
+        return self._bulk("market_snapshot", fields)
+
+    def coarse_snapshot(self, fields=None) -> pd.DataFrame:
+        return self._bulk("coarse_snapshot", fields)
+
+    def stats(self) -> dict:
+        return {**self.hedge.stats(), **{m: h.stats() for m, h in self.bulk.items()}}
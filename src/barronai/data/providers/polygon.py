@@ -1,10 +1,22 @@
 from __future__ import annotations
-import os, requests, math, time, json
+import os, requests, math, time, threading, asyncio
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime, timezone, date
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from ..float_enricher import pick_float, yahoo_float
+from datetime import datetime, timezone, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type
+from ..bar_store import bar_store
+from ..indicators import indicator_engine
+from ..stream import session_bounds
+from ...core.rate_limit import limited, RateLimitTimeout
+from ...core.singleflight import coalesced
+from ...core.disk_cache import disk_cache
+from ...core.cassette import cassette
+from .hedged import Hedged
+from .base import wants, project
+from ..float_enricher import pick_float, yahoo_float, reference_store
 
 try:
     import yfinance as yf
@@ -12,38 +24,78 @@ except Exception:
     yf = None
 
 API = "https://api.polygon.io"
-CACHE_DIR = Path("tmp/cache/aggs"); CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = disk_cache().dir("aggs")   # size-bounded; old tickers are evicted by the cache manager
 CACHE_TTL_SECONDS = int(os.getenv("AGGS_CACHE_TTL","90"))
 DEBUG = os.getenv("DEBUG","0") in {"1","true","True","YES","yes"}
 SNAPSHOT_OK = os.getenv("SNAPSHOT_OK","0") in {"1","true","True","YES","yes"}    # polygon snapshot off on free tier
 POLY_INTRADAY = os.getenv("POLY_INTRADAY","1") in {"1","true","True","YES","yes"}  # set 0 to force yf
+POLY_MAX_WORKERS = int(os.getenv("POLY_MAX_WORKERS","8"))  # concurrent tickers per snapshot; 1 = serial
+DAILY_LOOKBACK_DAYS = 380   # calendar days of daily bars kept for 52w high / prev close
+DAILY_FIELDS = ("pct_change", "yesterday_volume", "fifty_two_week_high")   # read from _daily_stats
+INDICATOR_FIELDS = ("rel_volume", "ema20", "atr")   # only _indicators computes these; vwap needs it without a snapshot
 
 def _log(*a): 
     if DEBUG: print("[polygon]", *a)
 
+def _safe_call(fn, *a):
+    try: return fn(*a)
+    except Exception as e:
+        _log("call failed", getattr(fn, "__name__", fn), e)
+        return []
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+def _http() -> requests.Session:
+    """One keep-alive session per process, pooled wide enough for the worker fan-out."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                size = max(10, POLY_MAX_WORKERS * 2)
+                s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=size))
+                _session = s
+    return _session
+
+# out of rate budget is not retried: callers fall back (yfinance / cache) right away
 @retry(reraise=True, stop=stop_after_attempt(2), wait=wait_exponential(multiplier=0.5, max=2),
-       retry=retry_if_exception_type(Exception))
+       retry=retry_if_not_exception_type(RateLimitTimeout))
 def _get(path: str, params: dict | None=None):
-    params = params or {}; params["apiKey"] = os.getenv("POLYGON_API_KEY","")
-    r = requests.get(API+path, params=params, timeout=8)
+    params = dict(params or {})
+    return cassette().call("polygon", [path, params], lambda: _live_get(path, params))
+
+def _live_get(path: str, params: dict):
+    params = {**params, "apiKey": os.getenv("POLYGON_API_KEY","")}
+    r = limited("polygon", lambda: _http().get(API+path, params=params, timeout=8))
     if not r.ok: _log(f"HTTP {r.status_code}", path, r.text[:160])
     r.raise_for_status()
     return r.json()
 
 def _today_range_ms() -> tuple[int,int]:
-    now = datetime.now(timezone.utc)
-    start = int(datetime(now.year, now.month, now.day, tzinfo=timezone.utc).timestamp() * 1000)
-    end   = int(now.timestamp() * 1000)
-    return start, end
+    """From New York midnight of the current trading date to now (epoch ms)."""
+    end = int(cassette().clock() * 1000)
+    return session_bounds(end)[1], end
 
-def _save_cache_json(path: Path, rows: list[dict]):
-    try:
-        tmp = path.with_suffix(".tmp"); tmp.write_text(json.dumps(rows)); tmp.replace(path)
-    except Exception as e: _log("cache write failed", path, e)
+# one structured .npy per ticker: columnar, memory-mappable, no per-row parsing on read
+BAR_DTYPE = np.dtype([("t","<i8"),("o","<f8"),("h","<f8"),("l","<f8"),("c","<f8"),
+                      ("v","<f8"),("vw","<f8"),("n","<f8")])
+
+def _bars_to_array(df: pd.DataFrame) -> np.ndarray:
+    arr = np.empty(len(df), dtype=BAR_DTYPE)
+    for f in BAR_DTYPE.names:
+        if f in df: arr[f] = pd.to_numeric(df[f], errors="coerce").to_numpy()
+        else: arr[f] = 0 if f == "t" else np.nan
+    return arr
 
-def _load_cache_json(path: Path) -> list[dict]:
-    try: return json.loads(path.read_text())
-    except Exception: return []
+def _save_cache_bars(path: Path, df: pd.DataFrame):
+    with open(path, "wb") as fh: np.save(fh, _bars_to_array(df), allow_pickle=False)
+
+def _load_cache_bars(path: Path) -> pd.DataFrame:
+    try: arr = np.load(path, mmap_mode="r", allow_pickle=False)
+    except Exception: return pd.DataFrame()
+    if not len(arr): return pd.DataFrame()
+    return pd.DataFrame({f: arr[f] for f in BAR_DTYPE.names})
 
 def _flatten_yf(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     """Make sure columns are 1-D (no MultiIndex). Select the 'ticker' slice if needed."""
@@ -61,11 +113,13 @@ def _flatten_yf(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
             df.columns = df.columns.get_level_values(0)
     return df
 
+@coalesced("yf_intraday")
 def _yf_intraday_df(t: str) -> pd.DataFrame:
     """Fallback: yfinance 1m bars for today; returns columns t,o,h,l,c,v,vw."""
     if yf is None: return pd.DataFrame()
     try:
-        df = yf.download(t, period="1d", interval="1m", prepost=False, progress=False, auto_adjust=False)
+        df = cassette().call("yf.download", [t, "1d", "1m"], lambda: yf.download(
+            t, period="1d", interval="1m", prepost=False, progress=False, auto_adjust=False))
         if df is None or df.empty: return pd.DataFrame()
         df = _flatten_yf(df, t)
 
@@ -93,50 +147,98 @@ def _yf_intraday_df(t: str) -> pd.DataFrame:
         _log("yfinance fallback failed", t, e)
         return pd.DataFrame()
 
+def _merge_bars(cached: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+    """Union by bar start time; fresh rows win so a still-forming bar gets replaced. Sorted desc."""
+    df = pd.concat([d for d in (cached, fresh) if not d.empty], ignore_index=True)
+    return df.drop_duplicates("t", keep="last").sort_values("t", ascending=False).reset_index(drop=True)
+
+@coalesced("aggs_today")
 def _aggs_today_cached(t: str) -> tuple[pd.DataFrame, str]:
-    """Return (df, source) where source ∈ {'live','cache','yf','none'}."""
-    cache_path = CACHE_DIR / f"{t.upper()}.json"
-    now = time.time()
+    """Return (df, source) where source ∈ {'memory','live','cache','yf','none'}.
 
-    # 1) fresh cache
-    if cache_path.exists():
-        age = now - cache_path.stat().st_mtime
-        if age <= CACHE_TTL_SECONDS:
-            rows = _load_cache_json(cache_path)
-            if rows: return pd.DataFrame(rows), "cache"
-
-    # 2) polygon live (free tier often 403/429)
-    if POLY_INTRADAY:
-        try:
-            s,e = _today_range_ms()
+    Reads the process-wide BarStore first (fed by earlier fetches and by the websocket stream);
+    anything fetched here is written back into it.
+    """
+    store = bar_store()
+    s,_ = _today_range_ms()
+    if store.seeded(t) and store.age(t) <= CACHE_TTL_SECONDS:
+        df = store.frame(t, since=s, desc=True)
+        if not df.empty: return df, "memory"
+    df, src = _fetch_aggs_today(t)
+    if src in ("live", "yf") or (src == "cache" and not df.empty and int(df["t"].max()) >= s):
+        store.extend(t, df)
+    return df, src
+
+def _polygon_live_aggs(t: str, cached: pd.DataFrame) -> pd.DataFrame | None:
+    """Polygon minute bars merged over today's cached ones (incremental when any are cached)."""
+    s,e = _today_range_ms()
+    try:
+        if not cached.empty:
+            since = int(cached["t"].max())
+            res = _get(f"/v2/aggs/ticker/{t}/range/1/minute/{since}/{e}",
+                       {"adjusted":"true","sort":"asc","limit":5000})
+        else:
             res = _get(f"/v2/aggs/ticker/{t}/range/1/minute/{s}/{e}",
                        {"adjusted":"true","sort":"desc","limit":390})
-            rows = res.get("results", []) or []
-            if rows:
-                _save_cache_json(cache_path, rows)
-                return pd.DataFrame(rows), "live"
-        except requests.HTTPError as he:
-            code = getattr(he.response, "status_code", 0)
-            if code in (401,403,429,400):
-                _log("live fetch blocked; using yfinance", t, code)
-            else:
-                _log("live fetch failed hard", t, he)
-        except Exception as e:
-            _log("live fetch failed; using yfinance", t, e)
+        fresh = pd.DataFrame(res.get("results", []) or [])
+        if fresh.empty and cached.empty: return None
+        return _merge_bars(cached, fresh)
+    except requests.HTTPError as he:
+        code = getattr(he.response, "status_code", 0)
+        if code in (401,403,429,400):
+            _log("live fetch blocked; using yfinance", t, code)
+        else:
+            _log("live fetch failed hard", t, he)
+    except Exception as e:
+        _log("live fetch failed; using yfinance", t, e)
+    return None
 
-    # 3) yfinance fallback
+def _yf_live_aggs(t: str, cached: pd.DataFrame) -> pd.DataFrame | None:
     df = _yf_intraday_df(t)
-    if not df.empty:
-        _save_cache_json(cache_path, df.to_dict(orient="records"))
-        return df, "yf"
+    return None if df.empty else df
+
+def _keep_late_aggs(df: pd.DataFrame, t: str, cached: pd.DataFrame):
+    """A Polygon fetch that lost the hedge to yfinance still refreshes the disk cache and BarStore."""
+    if not disk_cache().write("aggs", f"{t.upper()}.npy", lambda p: _save_cache_bars(p, df)):
+        _log("cache write failed", t)
+    bar_store().extend(t, df)
+
+_AGGS_HEDGE = Hedged("aggs_today", ("live", _polygon_live_aggs), ("yf", _yf_live_aggs),
+                     usable=lambda df: df is not None and not df.empty,
+                     key=lambda t, cached: t.upper(), on_late=_keep_late_aggs)
+
+def _fetch_aggs_today(t: str) -> tuple[pd.DataFrame, str]:
+    """Disk cache / Polygon hedged by yfinance; source ∈ {'live','cache','yf','none'}.
+
+    Today's bars already on disk are kept; a refresh only asks Polygon for bars at or after the
+    last cached bar (re-fetching that one since it may still have been forming) and merges them in.
+    """
+    cache, key = disk_cache(), f"{t.upper()}.npy"
+    s,e = _today_range_ms()
+    stale = cache.read("aggs", key, _load_cache_bars, count=False)
+    if stale is None: stale = pd.DataFrame()
+    cached = stale[stale["t"] >= s] if not stale.empty else stale
+
+    # 1) fresh cache
+    fresh = not cached.empty and cache.age("aggs", key) <= CACHE_TTL_SECONDS
+    cache.note("aggs", "hit" if fresh else "miss")
+    if fresh:
+        return cached.reset_index(drop=True), "cache"
+
+    # 2) polygon live, hedged with yfinance when Polygon runs past its own p95 (or fails)
+    df, src = (_AGGS_HEDGE(t, cached) if POLY_INTRADAY else (_yf_live_aggs(t, cached), "yf"))
+    if df is not None and not df.empty:
+        if not cache.write("aggs", key, lambda p: _save_cache_bars(p, df)):
+            _log("cache write failed", t)
+        return df, src
 
     # 4) stale cache last resort
-    if cache_path.exists():
-        rows = _load_cache_json(cache_path)
-        if rows: return pd.DataFrame(rows), "cache"
+    if not stale.empty:
+        return stale, "cache"
 
     return pd.DataFrame(), "none"
 
+@coalesced("shares_outstanding")
 def _shares_outstanding(t: str) -> float | None:
     try:
         res = _get(f"/v3/reference/tickers/{t}", {"date": date.today().isoformat()})
@@ -145,80 +247,291 @@ def _shares_outstanding(t: str) -> float | None:
     except Exception:
         return None
 
-def _rvol_and_ema20(df: pd.DataFrame) -> tuple[float|float("nan"), float|float("nan")]:
+SNAPSHOT_COLUMNS = ["ticker","last","volume","float","day_high","vwap","pct_change","spread_pct",
+                    "dollar_volume","rel_volume","ema20","yesterday_volume","fifty_two_week_high",
+                    "atr","agg_source"]
+
+# bulk columns that quote_snapshot defines differently (rel_volume: day vs yesterday there, last bar
+# vs 30-bar mean here; spread_pct: real quote there, placeholder here). Phase one leaves them out so
+# its prefilter can't reject rows the fine scan would hit.
+COARSE_DIVERGENT = ("rel_volume", "spread_pct")
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return pd.to_numeric(df[name], errors="coerce") if name in df else pd.Series(math.nan, index=df.index)
+
+def _normalize_bulk(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """Map a flattened bulk frame (day.*, prevDay.*, ... columns) onto SNAPSHOT_COLUMNS."""
+    if df.empty: return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    last = _col(df, "lastTrade.p").where(lambda x: x > 0)
+    last = last.fillna(_col(df, "min.c").where(lambda x: x > 0)).fillna(_col(df, "day.c").where(lambda x: x > 0))
+    prev_close = _col(df, "prevDay.c").where(lambda x: x > 0)
+    volume = _col(df, "day.v").where(lambda x: x > 0)
+    yvol = _col(df, "prevDay.v").fillna(0.0)
+    bid, ask = _col(df, "lastQuote.p"), _col(df, "lastQuote.P")
+    mid = (bid + ask) / 2.0
+    spread = ((ask - bid) / mid * 100.0).where((bid > 0) & (ask >= bid)).fillna(0.6)
+    out = pd.DataFrame({
+        "ticker": df["ticker"].astype(str),
+        "last": last,
+        "volume": volume,
+        "float": math.nan,
+        "day_high": _col(df, "day.h").where(lambda x: x > 0),
+        "vwap": _col(df, "day.vw").where(lambda x: x > 0),
+        "pct_change": (last - prev_close) / prev_close * 100.0,
+        "spread_pct": spread,
+        "dollar_volume": last * volume,
+        # session-relative: today's volume so far vs all of yesterday's (meaningless for EOD rows)
+        "rel_volume": (volume / yvol).where(yvol > 0) if source != "eod" else math.nan,
+        "ema20": math.nan,
+        "yesterday_volume": yvol,
+        "fifty_two_week_high": math.nan,
+        "atr": math.nan,
+        "agg_source": source,
+    })
+    return out[out["last"].notna()].reset_index(drop=True)
+
+def _bulk_snapshot() -> pd.DataFrame:
+    """Full US equities snapshot in one call (needs a plan with snapshot access)."""
+    res = _get("/v2/snapshot/locale/us/markets/stocks/tickers", {"include_otc": "false"})
+    rows = res.get("tickers", []) or []
+    return _normalize_bulk(pd.json_normalize(rows), "snapshot")
+
+def _grouped_daily(day: date) -> pd.DataFrame:
+    res = _get(f"/v2/aggs/grouped/locale/us/market/stocks/{day.isoformat()}", {"adjusted": "true"})
+    return pd.DataFrame(res.get("results", []) or [])
+
+def _bulk_grouped(asof: date | None = None, lookback_days: int = 7) -> pd.DataFrame:
+    """Last completed session from grouped daily aggs, prev session for pct_change (EOD data)."""
+    day = asof or date.today()
+    sessions: list[pd.DataFrame] = []
+    for _ in range(lookback_days * 2):
+        day -= timedelta(days=1)
+        if day.weekday() >= 5: continue
+        try: g = _grouped_daily(day)
+        except Exception as e:
+            _log("grouped daily failed", day, e); g = pd.DataFrame()
+        if not g.empty: sessions.append(g)
+        if len(sessions) == 2: break
+    if not sessions: return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    cur = sessions[0].rename(columns={"T": "ticker", "c": "day.c", "h": "day.h", "vw": "day.vw", "v": "day.v"})
+    if len(sessions) > 1:
+        prev = sessions[1].rename(columns={"T": "ticker", "c": "prevDay.c", "v": "prevDay.v"})
+        cur = cur.merge(prev[["ticker", "prevDay.c", "prevDay.v"]], on="ticker", how="left")
+    return _normalize_bulk(cur, "eod")
+
+def _fetch_daily(t: str) -> pd.DataFrame:
+    today = date.today()
+    frm, to = today - timedelta(days=DAILY_LOOKBACK_DAYS), today - timedelta(days=1)
+    res = _get(f"/v2/aggs/ticker/{t}/range/1/day/{frm.isoformat()}/{to.isoformat()}",
+               {"adjusted":"true","sort":"asc","limit":"500"})
+    return pd.DataFrame(res.get("results", []) or [])
+
+@coalesced("daily_history")
+def _daily_history(t: str, fetch: bool = True) -> pd.DataFrame:
+    """Completed daily bars for the past year (ascending), cached on disk for the day."""
+    cache, key = disk_cache(), f"{t.upper()}-{date.today().isoformat()}.npy"
+    df = cache.read("daily", key, _load_cache_bars)
+    if df is not None or not fetch:
+        return df if df is not None else pd.DataFrame()
+    try: df = _fetch_daily(t)
+    except Exception as e:
+        _log("daily history failed", t, e)
+        return pd.DataFrame()
+    cache.write("daily", key, lambda p: _save_cache_bars(p, df))   # empty too: unknown symbols stay quiet
+    return df
+
+def _daily_stats(t: str) -> dict:
+    """prev_close / yesterday_volume / 52w high from cached daily history only (warmed pre-open)."""
+    d = _daily_history(t, fetch=False)
+    if d.empty: return {}
+    return {"prev_close": float(d["c"].iloc[-1]), "yesterday_volume": float(d["v"].iloc[-1]),
+            "fifty_two_week_high": float(d["h"].tail(252).max())}
+
+@coalesced("reference_float")
+def _reference_float(t: str) -> float | None:
+    """Polygon shares outstanding, else Yahoo float; served from the daily reference store."""
+    return reference_store().float_for(t, lambda x: pick_float(_shares_outstanding(x), yahoo_float(x)))
+
+def _indicators(t: str, aggs: pd.DataFrame) -> dict:
+    """EMA20 / RVOL / session VWAP / ATR / HOD from the incremental engine (aggs sorted desc)."""
+    if aggs.empty: return {}
+    n = len(aggs)
+    cols = {f: (aggs[f].to_numpy(dtype=np.int64 if f == "t" else np.float64)[::-1] if f in aggs
+                else np.full(n, np.nan)) for f in ("t","o","h","l","c","v","vw")}
+    try: return indicator_engine().sync(t, cols)
+    except Exception as e:
+        _log("indicator error", t, e)
+        return {}
+
+@coalesced("ticker_snapshot")
+def _ticker_snapshot(t: str) -> dict:
+    """Per-ticker snapshot fields (empty when SNAPSHOT_OK is off or the call fails)."""
+    if not SNAPSHOT_OK: return {}
     try:
-        if df.empty: return math.nan, math.nan
-        # df sorted desc: use first bar as "last"
-        last_vol = float(df["v"].iloc[0])
-        avg_vol  = float(df["v"].rolling(30).mean().iloc[0]) if len(df) >= 30 else float(df["v"].mean())
-        rvol = (last_vol/avg_vol) if avg_vol else math.nan
-        ema20 = float(df["c"].iloc[::-1].ewm(span=20, adjust=False).mean().iloc[-1])  # compute on asc
-        return rvol, ema20
-    except Exception:
-        return math.nan, math.nan
+        snap = _get(f"/v2/snapshot/locale/us/markets/stocks/tickers/{t}")
+        s = snap.get("ticker", {}) or {}
+        return {
+            "last": float(s.get("lastTrade", {}).get("p") or s.get("lastQuote", {}).get("P") or math.nan),
+            "day_high": float(s.get("day", {}).get("h") or math.nan),
+            "vwap_day": float(s.get("day", {}).get("vw") or math.nan),
+            "volume": int(s.get("day", {}).get("v") or 0),
+            "prev_close": float(s.get("prevDay", {}).get("c") or math.nan),
+        }
+    except Exception as e:
+        _log("snapshot error; using aggs/yf", t, e)
+        return {}
 
-class PolygonProvider:
-    def __init__(self): ...
+def _build_row(t: str, snap: dict, aggs: pd.DataFrame, src: str, float_shares: float | None,
+               daily: dict | None = None, fields=None) -> dict:
+    """Assemble one quote_snapshot row from already-fetched pieces (no I/O)."""
+    daily = daily or {}
+    last = snap.get("last", math.nan)
+    day_high = snap.get("day_high", math.nan)
+    vwap_day = snap.get("vwap_day", math.nan)
+    volume = snap.get("volume", 0)
+    prev_close = snap.get("prev_close", math.nan)
+    if math.isnan(prev_close): prev_close = daily.get("prev_close", math.nan)
 
-    def _one(self, t: str) -> dict:
-        last = day_high = vwap_day = math.nan
-        volume = 0
-        prev_close = math.nan
+    if not aggs.empty:
+        aggs = aggs.sort_values("t", ascending=False).reset_index(drop=True)
+        if math.isnan(last):
+            last = float(aggs["c"].iloc[0])
+        vwap_bar = float(aggs["vw"].iloc[0]) if "vw" in aggs and pd.notna(aggs["vw"].iloc[0]) else math.nan
+        if math.isnan(day_high):
+            try: day_high = float(aggs["h"].max())
+            except Exception: pass
+        if not volume:
+            try: volume = int(float(aggs["v"].sum()))
+            except Exception: pass
+    else:
+        vwap_bar = math.nan
+        src = "none"
 
-        if SNAPSHOT_OK:
-            try:
-                snap = _get(f"/v2/snapshot/locale/us/markets/stocks/tickers/{t}")
-                s = snap.get("ticker", {}) or {}
-                last = float(s.get("lastTrade", {}).get("p") or s.get("lastQuote", {}).get("P") or math.nan)
-                day_high = float(s.get("day", {}).get("h") or math.nan)
-                vwap_day = float(s.get("day", {}).get("vw") or math.nan)
-                volume = int(s.get("day", {}).get("v") or 0)
-                prev_close = float(s.get("prevDay", {}).get("c") or math.nan)
-            except Exception as e:
-                _log("snapshot error; using aggs/yf", t, e)
+    dv = (last or 0.0) * (volume or 0)
+    need_ind = wants(fields, *INDICATOR_FIELDS) or (wants(fields, "vwap") and math.isnan(vwap_day))
+    ind = _indicators(t, aggs) if need_ind else {}
+    pct_change = ((last - prev_close)/prev_close*100.0) if (prev_close and not math.isnan(prev_close) and last) else math.nan
+
+    return {
+        "ticker": t,
+        "last": last,
+        "volume": volume if volume else math.nan,
+        "float": float_shares,
+        "day_high": day_high,
+        "vwap": next((x for x in (ind.get("vwap", math.nan), vwap_day, vwap_bar) if not math.isnan(x)), math.nan),
+        "pct_change": pct_change,
+        "spread_pct": 0.6,
+        "dollar_volume": dv if dv else math.nan,
+        "rel_volume": ind.get("rel_volume", math.nan),
+        "ema20": ind.get("ema20", math.nan),
+        "yesterday_volume": daily.get("yesterday_volume", 0),
+        "fifty_two_week_high": max((x for x in (daily.get("fifty_two_week_high"), day_high)
+                                    if x is not None and not math.isnan(x)), default=math.nan),
+        "atr": ind.get("atr", math.nan),
+        "agg_source": src
+    }
+
+def _coarse_rows(fields=None) -> pd.DataFrame:
+    """Phase one of a two-phase scan: the live bulk snapshot with cached floats, no per-ticker I/O.
+    Empty without snapshot access (grouped daily is EOD, too stale to filter intraday on)."""
+    if not SNAPSHOT_OK: return pd.DataFrame()
+    try: df = _bulk_snapshot()
+    except Exception as e:
+        _log("bulk snapshot failed; skipping prefilter", e); return pd.DataFrame()
+    df = df.drop(columns=list(COARSE_DIVERGENT), errors="ignore")
+    if not df.empty and wants(fields, "float"):
+        df["float"] = pd.to_numeric(df["ticker"].map(reference_store().cached_floats(df["ticker"])), errors="coerce")
+    return project(df, fields)
+
+def _market_rows(fields=None) -> pd.DataFrame:
+    """Whole-market rows in the quote_snapshot schema from the live snapshot; empty without it.
+    Never falls back to grouped daily: that is last session's EOD data (warm-up ranking only)."""
+    df = pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    if SNAPSHOT_OK:
+        try: df = _bulk_snapshot()
+        except Exception as e: _log("bulk snapshot failed; caller falls back to the watchlist", e)
+    if not df.empty and wants(fields, "float"):
+        # floats only from the reference cache; warm it with reference_store().prewarm()
+        floats = reference_store().cached_floats(df["ticker"])
+        df["float"] = pd.to_numeric(df["ticker"].map(floats), errors="coerce")
+    return project(df, fields)
 
+class PolygonProvider:
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max(1, int(max_workers or POLY_MAX_WORKERS))
+
+    def _one(self, t: str, fields=None) -> dict:
+        snap = _ticker_snapshot(t)
         aggs, src = _aggs_today_cached(t)
-        if not aggs.empty:
-            aggs = aggs.sort_values("t", ascending=False).reset_index(drop=True)
-            if math.isnan(last):
-                last = float(aggs["c"].iloc[0])
-            vwap_bar = float(aggs["vw"].iloc[0]) if "vw" in aggs and pd.notna(aggs["vw"].iloc[0]) else math.nan
-            if math.isnan(day_high):
-                try: day_high = float(aggs["h"].max())
-                except Exception: pass
-            if not volume:
-                try: volume = int(float(aggs["v"].sum()))
-                except Exception: pass
+        fl = _reference_float(t) if wants(fields, "float") else None
+        daily = _daily_stats(t) if wants(fields, *DAILY_FIELDS) else None
+        return _build_row(t, snap, aggs, src, fl, daily, fields)
+
+    def _one_safe(self, t: str, fields=None) -> dict | None:
+        try: return self._one(t, fields)
+        except Exception as e:
+            _log("row error", t, e)
+            return None
+
+    def coarse_snapshot(self, fields=None) -> pd.DataFrame:
+        return _coarse_rows(fields)
+
+    def market_snapshot(self, fields=None) -> pd.DataFrame:
+        return _market_rows(fields)
+
+    def quote_snapshot(self, tickers, fields=None, *, max_workers: int | None = None):
+        """Fan tickers out over a bounded pool; rows keep the input order. `fields`: see providers.base."""
+        tickers = list(tickers)
+        workers = min(max(1, int(max_workers or self.max_workers)), len(tickers) or 1)
+        if workers == 1:
+            rows = [self._one_safe(t, fields) for t in tickers]
         else:
-            vwap_bar = math.nan
-            src = "none"
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="polygon") as pool:
+                rows = list(pool.map(lambda t: self._one_safe(t, fields), tickers))
+        reference_store().save()
+        return project(pd.DataFrame([r for r in rows if r is not None]), fields)
 
-        float_shares = _shares_outstanding(t)
-        dv = (last or 0.0) * (volume or 0)
-        rvol, ema20 = _rvol_and_ema20(aggs if not aggs.empty else pd.DataFrame())
-        pct_change = ((last - prev_close)/prev_close*100.0) if (prev_close and not math.isnan(prev_close) and last) else math.nan
+class AsyncPolygonProvider:
+    """asyncio flavour of PolygonProvider.
 
-        return {
-            "ticker": t,
-            "last": last,
-            "volume": volume if volume else math.nan,
-            "float": pick_float(float_shares, yahoo_float(t)),
-            "day_high": day_high,
-            "vwap": vwap_bar if not math.isnan(vwap_bar) else vwap_day,
-            "pct_change": pct_change,
-            "spread_pct": 0.6,
-            "dollar_volume": dv if dv else math.nan,
-            "rel_volume": rvol,
-            "ema20": ema20,
-            "yesterday_volume": 0,
-            "fifty_two_week_high": math.nan,
-            "atr": math.nan,
-            "agg_source": src
-        }
+    The blocking session-pooled calls run on worker threads, so one ticker's snapshot, aggs and
+    float lookups overlap each other and every other ticker's, bounded by max_workers.
+    """
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max(1, int(max_workers or POLY_MAX_WORKERS))
+
+    async def aggs_today(self, t: str) -> tuple[pd.DataFrame, str]:
+        return await asyncio.to_thread(_aggs_today_cached, t)
+
+    async def reference_float(self, t: str) -> float | None:
+        return await asyncio.to_thread(_reference_float, t)
+
+    async def news(self, t: str, limit: int = 20) -> list[dict]:
+        from ...nlp.benzinga import fetch_benzinga
+        from ...nlp.catalyst_nlp import fetch_news
+        items = await asyncio.to_thread(_safe_call, fetch_benzinga, t, limit)
+        return items or await asyncio.to_thread(_safe_call, fetch_news, t, limit)
+
+    async def _one(self, t: str, sem: asyncio.Semaphore, fields=None) -> dict | None:
+        async with sem:
+            try:
+                snap, (aggs, src), fl = await asyncio.gather(
+                    asyncio.to_thread(_ticker_snapshot, t), self.aggs_today(t),
+                    self.reference_float(t) if wants(fields, "float") else asyncio.sleep(0))
+                daily = await asyncio.to_thread(_daily_stats, t) if wants(fields, *DAILY_FIELDS) else None
+                return _build_row(t, snap, aggs, src, fl, daily, fields)
+            except Exception as e:
+                _log("row error", t, e)
+                return None
+
+    async def coarse_snapshot(self, fields=None) -> pd.DataFrame:
+        return await asyncio.to_thread(_coarse_rows, fields)
+
+    async def market_snapshot(self, fields=None) -> pd.DataFrame:
+        return await asyncio.to_thread(_market_rows, fields)
 
-    def quote_snapshot(self, tickers):
-        rows = []
-        for t in tickers:
-            try: rows.append(self._one(t))
-            except Exception as e: _log("row error", t, e)
-        return pd.DataFrame(rows)
+    async def quote_snapshot(self, tickers, fields=None) -> pd.DataFrame:
+        sem = asyncio.Semaphore(self.max_workers)
+        rows = await asyncio.gather(*(self._one(t, sem, fields) for t in tickers))
+        await asyncio.to_thread(reference_store().save)
+        return project(pd.DataFrame([r for r in rows if r is not None]), fields)
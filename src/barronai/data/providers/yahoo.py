@@ -1,18 +1,88 @@
 from __future__ import annotations
+import asyncio, os
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from ..float_enricher import pick_float, yahoo_float
+from ..float_enricher import pick_float, reference_store
+from ...core.cassette import cassette
+from .base import wants, project
+
+YF_MAX_WORKERS = int(os.getenv("YF_MAX_WORKERS","8"))
+YF_BATCH = os.getenv("YF_BATCH","1") in {"1","true","True","YES","yes"}  # 0 = old per-ticker path
+
+_FAST_KEYS = ("last_price", "previous_close", "day_high", "last_volume", "year_high")
 
 def _safe(v, d=None):
     return d if v is None or (isinstance(v, float) and np.isnan(v)) else v
 
+def _field(df: pd.DataFrame, name: str, tickers: list[str]) -> pd.DataFrame:
+    """One OHLCV field from a yf.download frame as [time x ticker], whatever the column layout."""
+    if df is None or df.empty: return pd.DataFrame(columns=tickers, dtype=float)
+    if isinstance(df.columns, pd.MultiIndex):
+        lvl = 0 if name in df.columns.get_level_values(0) else 1
+        if name not in df.columns.get_level_values(lvl): return pd.DataFrame(index=df.index, columns=tickers, dtype=float)
+        out = df.xs(name, axis=1, level=lvl)
+    else:
+        out = df[[name]].set_axis(tickers[:1], axis=1) if name in df else pd.DataFrame(index=df.index)
+    return out.reindex(columns=tickers).apply(pd.to_numeric, errors="coerce")
+
+def _last_valid(df: pd.DataFrame) -> pd.Series:
+    return df.ffill().iloc[-1] if len(df) else pd.Series(np.nan, index=df.columns)
+
+def batch_snapshot(tickers, fields=None) -> pd.DataFrame:
+    """quote_snapshot rows for all tickers from two multi-symbol downloads (1y daily + today's 1m)."""
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    if not tickers: return pd.DataFrame()
+    kw = dict(group_by="column", auto_adjust=False, progress=False, threads=True)
+    daily = cassette().call("yf.download", [tickers, "1y", "1d"],
+                            lambda: yf.download(tickers, period="1y", interval="1d", **kw))
+    intra = cassette().call("yf.download", [tickers, "1d", "1m"],
+                            lambda: yf.download(tickers, period="1d", interval="1m", prepost=False, **kw))
+
+    dclose, dhigh, dvol = (_field(daily, f, tickers) for f in ("Close", "High", "Volume"))
+    ih, ic, iv = (_field(intra, f, tickers) for f in ("High", "Close", "Volume"))
+    il = _field(intra, "Low", tickers)
+
+    # is the last daily row today's (still-forming) session?
+    today_row = bool(len(dclose)) and len(ic) and pd.Timestamp(dclose.index[-1]).date() == pd.Timestamp(ic.index[-1]).date()
+    past_close = dclose.iloc[:-1] if today_row else dclose
+    past_vol = dvol.iloc[:-1] if today_row else dvol
+
+    last = _last_valid(ic).fillna(_last_valid(dclose))
+    prev_close = _last_valid(past_close)
+    ivs = iv.fillna(0.0)
+    volume = ivs.sum() if len(iv) else pd.Series(0.0, index=tickers)
+    if today_row: volume = volume.where(volume > 0, dvol.iloc[-1])
+    day_high = ih.max() if len(ih) else pd.Series(np.nan, index=tickers)
+    if today_row: day_high = day_high.fillna(dhigh.iloc[-1])
+    tp = (ih + il + ic) / 3.0
+    vwap = ((tp * ivs).sum() / ivs.sum()).where(ivs.sum() > 0).fillna(last)
+    atr = dclose.diff().abs().rolling(14).mean().iloc[-1] if len(dclose) else pd.Series(np.nan, index=tickers)
+
+    floats = reference_store().cached_floats(tickers) if wants(fields, "float") else {}
+    out = pd.DataFrame({
+        "ticker": tickers,
+        "last": last.to_numpy(),
+        "volume": volume.fillna(0).astype("int64").to_numpy(),
+        "float": pd.to_numeric(pd.Series(tickers).map(floats), errors="coerce").to_numpy(),
+        "day_high": day_high.to_numpy(),
+        "vwap": vwap.to_numpy(),
+        "pct_change": ((last - prev_close) / prev_close * 100.0).to_numpy(),
+        "spread_pct": 0.8,
+        "dollar_volume": (last * volume).fillna(0.0).to_numpy(),
+        "rel_volume": 1.0,
+        "yesterday_volume": _last_valid(past_vol).fillna(0).to_numpy(),
+        "fifty_two_week_high": pd.concat([dhigh.max(), day_high], axis=1).max(axis=1).to_numpy(),
+        "atr": atr.to_numpy(),
+    })
+    return project(out[out["last"].notna()].reset_index(drop=True), fields)
+
 class YahooProvider:
     def __init__(self): ...
 
-    def _one(self, t: str) -> dict:
+    def _one(self, t: str, fields=None) -> dict:
         tk = yf.Ticker(t)
-        info = tk.fast_info or {}
+        info = cassette().call("yf.fast_info", [t], lambda: {k: _safe((tk.fast_info or {}).get(k)) for k in _FAST_KEYS})
         last = float(_safe(info.get("last_price"), np.nan))
         close_prev = float(_safe(info.get("previous_close"), np.nan))
         pct_change = float(np.nan) if np.isnan(last) or np.isnan(close_prev) else (last-close_prev)/close_prev*100.0
@@ -21,24 +91,66 @@ class YahooProvider:
         volume = int(_safe(info.get("last_volume"), 0))
         fifty_two_week_high = float(_safe(info.get("year_high"), np.nan))
         float_shares = np.nan
-        try:
-            closes = tk.history(period="1mo", interval="1d")["Close"]
-            atr = float(closes.diff().abs().rolling(14).mean().iloc[-1])
-        except Exception:
-            atr = np.nan
+        atr = np.nan
+        if wants(fields, "atr"):
+            try:
+                closes = cassette().call("yf.history", [t, "1mo", "1d"],
+                                         lambda: tk.history(period="1mo", interval="1d"))["Close"]
+                atr = float(closes.diff().abs().rolling(14).mean().iloc[-1])
+            except Exception:
+                pass
         dollar_volume = float(last * volume) if last and volume else 0.0
         rel_volume = 1.0
         spread_pct = 0.8
         return {
-            "ticker": t, "last": last, "volume": volume, "float": pick_float(float_shares, yahoo_float(t)),
+            "ticker": t, "last": last, "volume": volume, "float": pick_float(float_shares, reference_store().float_for(t)) if wants(fields, "float") else np.nan,
             "day_high": day_high, "vwap": vwap, "pct_change": pct_change,
             "spread_pct": spread_pct, "dollar_volume": dollar_volume, "rel_volume": rel_volume,
             "yesterday_volume": 0, "fifty_two_week_high": fifty_two_week_high, "atr": atr,
         }
 
-    def quote_snapshot(self, tickers):
+    def quote_snapshot(self, tickers, fields=None):
+        tickers = list(tickers)
+        if YF_BATCH and tickers:
+            try:
+                if wants(fields, "float"): reference_store().prewarm(tickers, max_workers=YF_MAX_WORKERS)
+                df = batch_snapshot(tickers, fields)
+                if not df.empty: return df
+            except Exception:
+                pass  # fall through to the per-ticker path
         rows = []
         for t in tickers:
-            try: rows.append(self._one(t))
+            try: rows.append(self._one(t, fields))
             except Exception: continue
-        return pd.DataFrame(rows)
+        reference_store().save()
+        return project(pd.DataFrame(rows), fields)
+
+class AsyncYahooProvider:
+    """asyncio flavour of YahooProvider; yfinance calls run on worker threads, bounded by max_workers."""
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max(1, int(max_workers or YF_MAX_WORKERS))
+        self._sync = YahooProvider()
+
+    async def aggs_today(self, t: str) -> tuple[pd.DataFrame, str]:
+        from .polygon import _yf_intraday_df
+        df = await asyncio.to_thread(_yf_intraday_df, t)
+        return df, ("yf" if not df.empty else "none")
+
+    async def reference_float(self, t: str) -> float | None:
+        return await asyncio.to_thread(reference_store().float_for, t)
+
+    async def news(self, t: str, limit: int = 15) -> list[dict]:
+        from ...nlp.catalyst_nlp import fetch_news
+        try: return await asyncio.to_thread(fetch_news, t, limit)
+        except Exception: return []
+
+    async def _one(self, t: str, sem: asyncio.Semaphore, fields=None) -> dict | None:
+        async with sem:
+            try: return await asyncio.to_thread(self._sync._one, t, fields)
+            except Exception: return None
+
+    async def quote_snapshot(self, tickers, fields=None) -> pd.DataFrame:
+        sem = asyncio.Semaphore(self.max_workers)
+        rows = await asyncio.gather(*(self._one(t, sem, fields) for t in tickers))
+        await asyncio.to_thread(reference_store().save)
+        return project(pd.DataFrame([r for r in rows if r is not None]), fields)
@@ -0,0 +1,101 @@
+"""Local websocket server that replays recorded minute bars in the Polygon stocks-feed protocol.
+
+    PYTHONPATH=./src python -m barronai.data.replay_server --dir tmp/cache/aggs --speed 60
+    STREAM_URL=ws://127.0.0.1:8765 ...   # point data.stream.BarStream at it
+
+Bars come from the aggs cache (*.npy, see providers/polygon.py). Each connection gets its own
+replay of the subscribed tickers, in timestamp order, paced at `speed`x real time (0 = no delay).
+"""
+from __future__ import annotations
+import argparse, asyncio, json
+from pathlib import Path
+import pandas as pd
+
+try:
+    import websockets
+except Exception:
+    websockets = None
+
+from .providers.polygon import CACHE_DIR, _load_cache_bars
+from .stream import trading_date
+
+def load_recorded(src: Path) -> pd.DataFrame:
+    """All cached bars under `src` as one asc-sorted frame with a `sym` column."""
+    frames = []
+    for p in sorted(Path(src).glob("*.npy")):
+        df = _load_cache_bars(p)
+        if not df.empty:
+            frames.append(df.assign(sym=p.stem.upper()))
+    if not frames: return pd.DataFrame(columns=["t","o","h","l","c","v","vw","sym"])
+    return pd.concat(frames, ignore_index=True).sort_values(["t","sym"], kind="stable").reset_index(drop=True)
+
+def to_events(bars: pd.DataFrame) -> list[dict]:
+    """Bars -> AM events, with per-symbol accumulated volume and VWAP that reset each trading date."""
+    out, acc = [], {}
+    for r in bars.itertuples(index=False):
+        v = float(r.v or 0.0); px = r.vw if pd.notna(r.vw) else r.c
+        day = trading_date(int(r.t))
+        d, av, pv = acc.get(r.sym, (day, 0.0, 0.0))
+        if d != day: av, pv = 0.0, 0.0
+        av, pv = av + v, pv + px * v
+        acc[r.sym] = (day, av, pv)
+        out.append({"ev": "AM", "sym": r.sym, "s": int(r.t), "e": int(r.t) + 60_000,
+                    "o": float(r.o), "h": float(r.h), "l": float(r.l), "c": float(r.c), "v": v,
+                    "vw": float(px), "av": av, "a": (pv / av) if av else float(px)})
+    return out
+
+class ReplayServer:
+    def __init__(self, events: list[dict], speed: float = 60.0, host: str = "127.0.0.1", port: int = 8765):
+        self.events, self.speed, self.host, self.port = events, speed, host, port
+
+    async def _handler(self, ws, path=None):
+        subs: set[str] = set()
+        subscribed = asyncio.Event()
+        await ws.send(json.dumps([{"ev": "status", "status": "connected", "message": "replay"}]))
+
+        async def reader():
+            async for raw in ws:
+                msg = json.loads(raw)
+                action, params = msg.get("action"), str(msg.get("params", ""))
+                if action == "auth":
+                    await ws.send(json.dumps([{"ev": "status", "status": "auth_success"}]))
+                elif action in ("subscribe", "unsubscribe"):
+                    syms = {p.split(".", 1)[1].upper() for p in params.split(",") if "." in p}
+                    if action == "subscribe": subs.update(syms); subscribed.set()
+                    else: subs.difference_update(syms)
+                    await ws.send(json.dumps([{"ev": "status", "status": "success",
+                                               "message": f"{action}d to: {params}"}]))
+
+        task = asyncio.create_task(reader())
+        try:
+            await subscribed.wait()
+            prev_t = None
+            for ev in self.events:
+                if prev_t is not None and self.speed > 0 and ev["s"] > prev_t:
+                    await asyncio.sleep((ev["s"] - prev_t) / 1000.0 / self.speed)
+                prev_t = ev["s"]
+                if ev["sym"] in subs or "*" in subs:
+                    await ws.send(json.dumps([ev]))
+            await task  # replay done; keep the socket open until the client leaves
+        finally:
+            task.cancel()
+
+    async def serve(self):
+        if websockets is None:
+            raise RuntimeError("websockets is not installed")
+        async with websockets.serve(self._handler, self.host, self.port):
+            await asyncio.Future()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default=str(CACHE_DIR))
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--speed", type=float, default=60.0)
+    args = ap.parse_args()
+    events = to_events(load_recorded(Path(args.dir)))
+    print(f"replaying {len(events)} bars on ws://{args.host}:{args.port} at {args.speed}x")
+    asyncio.run(ReplayServer(events, args.speed, args.host, args.port).serve())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import os, json, math, random, asyncio, threading, time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable
+from zoneinfo import ZoneInfo
+
+try:
+    import websockets
+except Exception:
+    websockets = None
+
+STREAM_URL = os.getenv("STREAM_URL", "wss://socket.polygon.io/stocks")
+STREAM_CHANNELS = tuple(c for c in os.getenv("STREAM_CHANNELS", "AM,T").split(",") if c)
+STREAM_MAX_BARS = int(os.getenv("STREAM_MAX_BARS", "960"))  # 4:00-20:00 ET of 1m bars
+STREAM_FRESH_S = float(os.getenv("STREAM_FRESH_S", "120"))   # overlay() ignores tickers quieter than this
+RECONNECT_MIN_S = 1.0
+RECONNECT_MAX_S = 30.0
+DEBUG = os.getenv("DEBUG","0") in {"1","true","True","YES","yes"}
+MARKET_TZ = ZoneInfo("America/New_York")
+
+def _log(*a):
+    if DEBUG: print("[stream]", *a)
+
+def trading_date(t_ms: int) -> date:
+    """Market (New York) date of an epoch-ms timestamp; sessions roll over on it."""
+    return datetime.fromtimestamp(t_ms / 1000, MARKET_TZ).date()
+
+def session_bounds(t_ms: int) -> tuple[date, int, int]:
+    """Trading date of t_ms and its [start, end) in epoch ms: New York midnights, DST-aware."""
+    d = trading_date(t_ms)
+    start = datetime(d.year, d.month, d.day, tzinfo=MARKET_TZ)
+    end = datetime.combine(d + timedelta(days=1), datetime.min.time(), MARKET_TZ)
+    return d, int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+@dataclass
+class LiveTicker:
+    """Running per-ticker state fed by minute-agg (AM) and trade (T) events.
+
+    Day fields (day_high, volume, vwap, bars) reset when an event from a later trading date
+    arrives; events from an earlier date are ignored.
+    """
+    ticker: str
+    last: float = math.nan
+    day_high: float = math.nan
+    volume: float = 0.0
+    vwap: float = math.nan          # session VWAP when the feed provides it (AM "a")
+    updated: float = 0.0
+    session: date | None = None
+    bars: deque = field(default_factory=lambda: deque(maxlen=STREAM_MAX_BARS))
+
+    def _roll(self, t_ms: int | None) -> bool:
+        """Start a new session if t_ms is on a later trading date; False for a stale event."""
+        if not t_ms: return True
+        d = trading_date(t_ms)
+        if self.session is None or d > self.session:
+            if self.session is not None:
+                self.day_high, self.volume, self.vwap = math.nan, 0.0, math.nan
+                self.bars.clear()
+            self.session = d
+        return d == self.session
+
+    def on_bar(self, bar: dict):
+        if not self._roll(bar["t"]): return
+        # a re-sent bar for the same minute replaces the still-forming one
+        if self.bars and self.bars[-1]["t"] == bar["t"]:
+            self.bars[-1] = bar
+        elif not self.bars or bar["t"] > self.bars[-1]["t"]:
+            self.bars.append(bar)
+        self.last = bar["c"]
+        self.day_high = bar["h"] if math.isnan(self.day_high) else max(self.day_high, bar["h"])
+        self.updated = time.time()
+
+    def on_trade(self, price: float, t_ms: int | None = None):
+        if not self._roll(t_ms): return
+        self.last = price
+        self.day_high = price if math.isnan(self.day_high) else max(self.day_high, price)
+        self.updated = time.time()
+
+def bar_from_event(ev: dict) -> dict:
+    """Polygon AM/A aggregate event -> the t,o,h,l,c,v,vw row shape used by the aggs cache."""
+    return {"t": int(ev.get("s", 0)), "o": float(ev.get("o", math.nan)), "h": float(ev.get("h", math.nan)),
+            "l": float(ev.get("l", math.nan)), "c": float(ev.get("c", math.nan)),
+            "v": float(ev.get("v", 0.0)), "vw": float(ev.get("vw", math.nan))}
+
+class BarStream:
+    """Websocket subscriber for Polygon-style stock events with reconnect + resubscribe.
+
+    Works against the live feed or the local replay server (data/replay_server.py).
+    Use start()/stop() from sync code; run() is the underlying coroutine.
+    """
+    def __init__(self, tickers: Iterable[str] = (), url: str = STREAM_URL, api_key: str | None = None,
+                 channels: Iterable[str] = STREAM_CHANNELS,
+                 on_bar: Callable[[str, dict], None] | None = None):
+        self.url = url
+        self.api_key = api_key if api_key is not None else os.getenv("POLYGON_API_KEY", "")
+        self.channels = tuple(channels)
+        self.on_bar = on_bar
+        self.tickers: set[str] = {t.upper() for t in tickers}
+        self.state: dict[str, LiveTicker] = {}
+        self.connected = False
+        self.reconnects = 0
+        self._ws = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    # -------- state
+    def get(self, ticker: str) -> LiveTicker | None:
+        return self.state.get(ticker.upper())
+
+    def _ticker(self, sym: str) -> LiveTicker:
+        lt = self.state.get(sym)
+        if lt is None:
+            with self._lock:
+                lt = self.state.setdefault(sym, LiveTicker(sym))
+        return lt
+
+    def _handle(self, ev: dict):
+        kind, sym = ev.get("ev"), str(ev.get("sym", "")).upper()
+        if kind in ("AM", "A") and sym:
+            bar = bar_from_event(ev)
+            lt = self._ticker(sym)
+            lt.on_bar(bar)
+            if lt.session == trading_date(bar["t"]):
+                if ev.get("av") is not None: lt.volume = float(ev["av"])
+                if ev.get("a") is not None: lt.vwap = float(ev["a"])
+            if self.on_bar:
+                try: self.on_bar(sym, bar)
+                except Exception as e: _log("on_bar failed", sym, e)
+        elif kind == "T" and sym:
+            self._ticker(sym).on_trade(float(ev.get("p", math.nan)), int(ev.get("t") or 0) or None)
+        elif kind == "status":
+            _log("status", ev.get("status"), ev.get("message", ""))
+
+    # -------- subscriptions
+    def _params(self, tickers: Iterable[str]) -> str:
+        return ",".join(f"{c}.{t}" for t in sorted(tickers) for c in self.channels)
+
+    async def _send(self, action: str, tickers: Iterable[str]):
+        tickers = list(tickers)
+        if self._ws is not None and tickers:
+            await self._ws.send(json.dumps({"action": action, "params": self._params(tickers)}))
+
+    def subscribe(self, tickers: Iterable[str]):
+        new = {t.upper() for t in tickers} - self.tickers
+        self.tickers |= new
+        if new and self._loop and self.connected:
+            asyncio.run_coroutine_threadsafe(self._send("subscribe", new), self._loop)
+
+    def unsubscribe(self, tickers: Iterable[str]):
+        gone = {t.upper() for t in tickers} & self.tickers
+        self.tickers -= gone
+        if gone and self._loop and self.connected:
+            asyncio.run_coroutine_threadsafe(self._send("unsubscribe", gone), self._loop)
+
+    # -------- connection
+    async def _session(self):
+        async with websockets.connect(self.url, max_size=None, ping_interval=20) as ws:
+            self._ws = ws
+            await ws.send(json.dumps({"action": "auth", "params": self.api_key}))
+            async for raw in ws:
+                msgs = json.loads(raw)
+                for ev in (msgs if isinstance(msgs, list) else [msgs]):
+                    if ev.get("ev") == "status":
+                        if ev.get("status") == "auth_failed":
+                            raise PermissionError(ev.get("message", "auth failed"))
+                        if ev.get("status") == "auth_success" and not self.connected:
+                            self.connected = True
+                            await self._send("subscribe", self.tickers)  # resubscribe on every (re)connect
+                    self._handle(ev)
+
+    async def run(self):
+        """Connect and consume forever; reconnects with jittered exponential backoff."""
+        if websockets is None:
+            raise RuntimeError("websockets is not installed")
+        self._loop = asyncio.get_running_loop()
+        delay = RECONNECT_MIN_S
+        while not self._stopping:
+            t0 = time.time()
+            try:
+                await self._session()
+            except asyncio.CancelledError:
+                raise
+            except PermissionError as e:
+                _log("auth failed; giving up", e); break
+            except Exception as e:
+                _log("disconnected", e)
+            finally:
+                self.connected = False
+                self._ws = None
+            if self._stopping: break
+            if time.time() - t0 > RECONNECT_MAX_S: delay = RECONNECT_MIN_S  # healthy session; reset
+            self.reconnects += 1
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay = min(RECONNECT_MAX_S, delay * 2)
+
+    def start(self) -> "BarStream":
+        """Run the stream on a daemon thread with its own event loop."""
+        if self._thread and self._thread.is_alive(): return self
+        self._stopping = False
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), name="bar-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread: self._thread.join(timeout)
+
+_active: BarStream | None = None
+
+def active_stream() -> BarStream | None:
+    """The process-wide stream, if one was started with start_stream()."""
+    return _active
+
+def overlay(df, stream: BarStream | None = None, max_age_s: float = STREAM_FRESH_S):
+    """Snapshot rows with last / day_high / vwap taken from the stream where it is fresher.
+
+    Only tickers updated within max_age_s are touched, and only columns df already has.
+    """
+    stream = stream or _active
+    if stream is None or df.empty or "ticker" not in df: return df
+    now, out = time.time(), None
+    for i, t in enumerate(df["ticker"]):
+        lt = stream.get(str(t))
+        if lt is None or now - lt.updated > max_age_s: continue
+        if out is None: out = df.copy()
+        for col, val in (("last", lt.last), ("day_high", lt.day_high), ("vwap", lt.vwap)):
+            if col in out and not math.isnan(val): out.iloc[i, out.columns.get_loc(col)] = val
+    return df if out is None else out
+
+def start_stream(tickers: Iterable[str], **kw) -> BarStream:
+    """Start (or extend) the process-wide stream; pushed bars land in the shared BarStore."""
+    global _active
+    if _active is None:
+        from .bar_store import bar_store
+        kw.setdefault("on_bar", bar_store().append)
+        _active = BarStream(tickers, **kw).start()
+    else:
+        _active.subscribe(tickers)
+    return _active
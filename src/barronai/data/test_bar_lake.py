@@ -0,0 +1,31 @@
+from datetime import date
+from unittest import mock
+import pandas as pd
+from barronai.data import bar_lake as bl
+from barronai.data.bar_lake import BarLake
+
+def test_bare_dates_are_market_dates():
+    assert bl._days("2025-10-14", "2025-10-15") == [date(2025, 10, 14), date(2025, 10, 15)]
+    assert bl._day(date(2025, 10, 14)) == date(2025, 10, 14)
+    assert bl._day("2025-10-15T02:00:00") == date(2025, 10, 14)          # naive datetimes stay UTC
+
+def test_sync_reports_failed_days(tmp_path):
+    lake = BarLake(root=tmp_path, offline=False)
+    def fetch(ticker, a, b):
+        if a.month == 9: raise RuntimeError("429")
+        return pd.DataFrame()
+    with mock.patch.object(lake, "_fetch", fetch), mock.patch.object(bl, "LAKE_CHUNK_DAYS", 2):
+        out = lake.sync("abcd", "2025-09-29", "2025-10-03")
+    assert out["failed_days"] == ["2025-09-29", "2025-09-30"]
+    assert out["fetched_days"] == 3 and out["requests"] == 2
+    assert not lake.has("ABCD", date(2025, 9, 29)) and lake.has("ABCD", date(2025, 10, 1))
+
+def main():
+    import tempfile
+    from pathlib import Path
+    test_bare_dates_are_market_dates()
+    with tempfile.TemporaryDirectory() as d: test_sync_reports_failed_days(Path(d))
+    print("BAR LAKE: ok")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from datetime import datetime
+import math
+import numpy as np
+import pandas as pd
+from barronai.data.indicators import IndicatorEngine
+from barronai.data.stream import MARKET_TZ
+
+def _ms(s: str) -> int:
+    return int(datetime.fromisoformat(s).replace(tzinfo=MARKET_TZ).timestamp() * 1000)
+
+# one EST session whose after-hours bars (19:00 ET = 00:00 UTC) fall on the next UTC day
+TIMES = ["2026-01-15 09:30", "2026-01-15 12:00", "2026-01-15 15:59", "2026-01-15 18:59",
+         "2026-01-15 19:01", "2026-01-15 19:45"]
+BARS = pd.DataFrame({"t": [_ms(s) for s in TIMES], "o": 10.0, "h": [10.5, 11.0, 10.8, 10.6, 12.0, 10.7],
+                     "l": 9.9, "c": [10.4, 10.9, 10.6, 10.5, 10.8, 10.6], "v": [1000.0, 3000.0, 2000.0, 500.0, 400.0, 300.0],
+                     "vw": [10.2, 10.8, 10.7, 10.5, 10.9, 10.6]})
+
+def _cols(df: pd.DataFrame) -> dict:
+    return {f: df[f].to_numpy(dtype=np.int64 if f == "t" else np.float64) for f in ("t","o","h","l","c","v","vw")}
+
+def _sync_each(eng: IndicatorEngine, df: pd.DataFrame) -> dict:
+    vals = {}
+    for k in range(1, len(df) + 1): vals = eng.sync("ABCD", _cols(df.iloc[:k]))
+    return vals
+
+def test_after_hours_est_stays_in_session():
+    eng = IndicatorEngine()
+    vals = _sync_each(eng, BARS)
+    assert eng.state("ABCD").n == len(BARS)
+    assert math.isclose(vals["vwap"], (BARS["vw"] * BARS["v"]).sum() / BARS["v"].sum())
+    assert vals["day_high"] == 12.0
+    assert math.isclose(vals["ema20"], BARS["c"].ewm(span=20, adjust=False).mean().iloc[-1])
+
+def test_next_trading_date_resets():
+    nxt = pd.DataFrame([{"t": _ms("2026-01-16 04:00"), "o": 9.0, "h": 9.2, "l": 8.9, "c": 9.1, "v": 100.0, "vw": 9.05}])
+    eng = IndicatorEngine()
+    vals = _sync_each(eng, pd.concat([BARS, nxt], ignore_index=True))
+    assert eng.state("ABCD").n == 1 and vals["day_high"] == 9.2 and math.isclose(vals["vwap"], 9.05)
+
+def main():
+    test_after_hours_est_stays_in_session(); test_next_trading_date_resets()
+    print("INDICATOR SESSIONS: ok")
+
+if __name__ == "__main__":
+    main()
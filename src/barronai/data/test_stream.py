@@ -0,0 +1,68 @@
+from datetime import datetime
+import math
+from unittest import mock
+import pandas as pd
+from barronai.data import stream
+from barronai.data.replay_server import to_events
+from barronai.data.stream import BarStream, MARKET_TZ
+
+def _ms(s: str) -> int:
+    return int(datetime.fromisoformat(s).replace(tzinfo=MARKET_TZ).timestamp() * 1000)
+
+# two sessions of one ticker: day two opens below day one's high and must not inherit its VWAP/volume
+BARS = pd.DataFrame([
+    {"t": _ms("2026-10-15 09:30"), "o": 10.0, "h": 10.5, "l": 9.9, "c": 10.4, "v": 1000.0, "vw": 10.2},
+    {"t": _ms("2026-10-15 09:31"), "o": 10.4, "h": 11.0, "l": 10.3, "c": 10.9, "v": 3000.0, "vw": 10.8},
+    {"t": _ms("2026-10-15 19:59"), "o": 10.6, "h": 10.7, "l": 10.5, "c": 10.6, "v": 1000.0, "vw": 10.6},
+    {"t": _ms("2026-10-16 04:00"), "o": 8.0, "h": 8.2, "l": 7.9, "c": 8.1, "v": 500.0, "vw": 8.0},
+    {"t": _ms("2026-10-16 04:01"), "o": 8.1, "h": 8.6, "l": 8.1, "c": 8.5, "v": 1500.0, "vw": 8.4},
+]).assign(sym="ABCD")
+
+def _replay(bars: pd.DataFrame) -> BarStream:
+    bs = BarStream(["ABCD"])
+    for ev in to_events(bars): bs._handle(ev)
+    return bs
+
+def test_first_session():
+    lt = _replay(BARS.iloc[:3]).get("ABCD")
+    assert lt.day_high == 11.0 and lt.volume == 5000.0
+    assert math.isclose(lt.vwap, (10.2 * 1000 + 10.8 * 3000 + 10.6 * 1000) / 5000)
+
+def test_session_rollover():
+    lt = _replay(BARS).get("ABCD")
+    assert lt.day_high == 8.6 and lt.volume == 2000.0 and len(lt.bars) == 2
+    assert math.isclose(lt.vwap, (8.0 * 500 + 8.4 * 1500) / 2000)
+
+def test_stale_events_ignored():
+    bs = _replay(BARS)
+    bs._handle({"ev": "T", "sym": "ABCD", "p": 12.0, "t": _ms("2026-10-15 19:59")})
+    assert bs.get("ABCD").day_high == 8.6 and bs.get("ABCD").last == 8.5
+
+def test_overlay_prefers_streamed_values():
+    bs = _replay(BARS)
+    polled = pd.DataFrame([{"ticker": "ABCD", "last": 8.3, "day_high": 8.2, "vwap": math.nan, "volume": 1.0},
+                           {"ticker": "ZZZZ", "last": 1.0, "day_high": 1.0, "vwap": 1.0, "volume": 1.0}])
+    out = stream.overlay(polled, bs)
+    assert out.loc[0, "last"] == 8.5 and out.loc[0, "day_high"] == 8.6
+    assert math.isclose(out.loc[0, "vwap"], (8.0 * 500 + 8.4 * 1500) / 2000)
+    assert out.loc[1].tolist() == polled.loc[1].tolist() and math.isnan(polled.loc[0, "vwap"])
+    assert stream.overlay(polled, bs, max_age_s=-1).equals(polled)      # stale stream: untouched
+
+def test_run_loop_starts_stream_for_watchlist_and_positions():
+    from barronai.core import scheduler as sc
+    started = []
+    with mock.patch.object(stream, "start_stream", lambda tickers: started.append(list(tickers)) or "s"), \
+         mock.patch.object(sc.TradeExecutor, "open_symbols", lambda self: ["ABCD", "AAPL"]), \
+         mock.patch.multiple(sc, WATCHLIST=["AAPL", "amd"], STREAM=False):
+        assert sc.maybe_start_stream() is None and not started
+        with mock.patch.object(sc, "STREAM", True):
+            assert sc.maybe_start_stream() == "s"
+    assert started == [["AAPL", "AMD", "ABCD"]]
+
+def main():
+    test_first_session(); test_session_rollover(); test_stale_events_ignored()
+    test_overlay_prefers_streamed_values(); test_run_loop_starts_stream_for_watchlist_and_positions()
+    print("STREAM REPLAY: ok")
+
+if __name__ == "__main__":
+    main()
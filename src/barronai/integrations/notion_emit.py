@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os, requests
+from ..core.rate_limit import limited
 
 NOTION_API = "https://api.notion.com/v1/pages"
 
@@ -23,5 +24,5 @@ def send_signal_to_notion(signal, *, database_id: str | None = None):
         "PowerHour": {"checkbox": signal.gated},
       }
     }
-    r = requests.post(NOTION_API, headers=headers, json=payload, timeout=15)
+    r = limited("notion", lambda: requests.post(NOTION_API, headers=headers, json=payload, timeout=15))
     return {"status": r.status_code, "text": r.text[:200]}
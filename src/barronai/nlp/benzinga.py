@@ -2,16 +2,26 @@ from __future__ import annotations
 import os, requests
 from typing import List, Dict, Any
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from ..core.rate_limit import limited
+from ..core.singleflight import coalesced
+from ..core.disk_cache import disk_cache
+from ..core.cassette import cassette
 
 BENZ_API = "https://api.benzinga.com/api/v2/news"
 analyzer = SentimentIntensityAnalyzer()
 
+@coalesced("benzinga")
 def fetch_benzinga(ticker: str, limit: int = 20) -> List[Dict[str, Any]]:
     token = os.getenv("BENZINGA_API_KEY","")
     if not token:
         return []
+    return disk_cache().cached_json("news", f"benzinga-{ticker.upper()}-{limit}.json",
+                                    lambda: cassette().call("benzinga", [ticker, limit],
+                                                            lambda: _fetch(token, ticker, limit)))
+
+def _fetch(token: str, ticker: str, limit: int) -> List[Dict[str, Any]]:
     params = {"token": token, "symbols": ticker, "pagesize": limit, "display_output": "full"}
-    r = requests.get(BENZ_API, params=params, timeout=12)
+    r = limited("benzinga", lambda: requests.get(BENZ_API, params=params, timeout=12))
     r.raise_for_status()
     out = []
     for item in r.json():
@@ -3,6 +3,9 @@ from typing import List, Dict, Any
 import hashlib, time
 import feedparser
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from ..core.singleflight import coalesced
+from ..core.disk_cache import disk_cache
+from ..core.cassette import cassette
 
 YF_RSS = "https://feeds.finance.yahoo.com/rss/2.0/headline?s={ticker}"
 
@@ -28,7 +31,12 @@ def _tags(text: str) -> List[str]:
             out.append(tag)
     return out
 
+@coalesced("rss_news")
 def fetch_news(ticker: str, limit: int = 15) -> List[Dict[str, Any]]:
+    return disk_cache().cached_json("news", f"rss-{ticker.upper()}-{limit}.json",
+                                    lambda: cassette().call("rss", [ticker, limit], lambda: _fetch_rss(ticker, limit)))
+
+def _fetch_rss(ticker: str, limit: int) -> List[Dict[str, Any]]:
     url = YF_RSS.format(ticker=ticker)
     feed = feedparser.parse(url)
     items = []